@@ -1,10 +1,14 @@
+import threading
+import time
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
-import plotly.express as px
-from src.model_training import load_all_models
-from src.preprocessing import preprocess_input, load_columns, load_scaler
+from src.metrics import METRICS, span, start_profiler_from_env
+from src.model_training import ModelRegistry, needs_scaling
+
+# Rows rendered in the batch results table; downloads always have every row.
+BATCH_DISPLAY_ROWS = 1_000
+
+# pandas, numpy, plotly and the preprocessing artifacts are imported lazily
+# so the intro page paints without paying for them.
 
 st.set_page_config(
     page_title="Customer Churn Prediction AI",
@@ -106,13 +110,136 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 @st.cache_resource
-def load_resources():
-    models = load_all_models()
-    columns = load_columns()
-    scaler = load_scaler()
-    return models, columns, scaler
+def get_registry():
+    return ModelRegistry()
+
+
+def get_pipeline():
+    from src.preprocessing import get_feature_pipeline
+    return get_feature_pipeline()
+
+
+@st.cache_resource
+def get_prediction_cache():
+    from src.prediction_cache import PredictionCache
+    return PredictionCache()
+
+
+@st.cache_resource
+def get_explainer(model_name):
+    from src.explain import ContributionExplainer
+    return ContributionExplainer(get_registry().get(model_name), get_pipeline().columns)
+
+
+@st.cache_resource
+def get_evaluation_reports():
+    # Held-out probabilities come from an on-disk cache keyed by artifact
+    # hash, so the models only run the first time a new artifact is seen.
+    from src.evaluation import evaluation_reports
+    return evaluation_reports(get_registry(), get_pipeline())
+
+
+@st.cache_resource
+def get_retention_sweeps():
+    # Sorted once per process; changing the cost inputs only re-runs the
+    # vectorized value pass.
+    from src.decision import retention_sweeps
+    return retention_sweeps(get_evaluation_reports())
+
+
+def get_cohort_index():
+    from src.cohort_index import get_cohort_index as load_index
+    return load_index(get_registry())
+
+
+def get_calibration():
+    from src.calibration import get_calibration as load_calibration
+    return load_calibration(get_registry())
+
+
+@st.cache_resource
+def get_monitoring_profile():
+    from src.monitoring import load_profile
+    return load_profile(registry=get_registry(), pipeline=get_pipeline())
+
+
+# Result-page figures are rebuilt from a few numbers, so reruns of the same
+# prediction (widget clicks, revisits) reuse the figure objects instead of
+# going through plotly again. Model-dependent entries are keyed by the
+# artifact version, so retraining never serves a stale chart.
+@st.cache_resource(max_entries=256)
+def gauge_figure(churn_probability, threshold):
+    from src.figures import churn_gauge
+    return churn_gauge(churn_probability, threshold)
+
+
+@st.cache_resource(max_entries=256)
+def probability_figure(stay_probability, churn_probability):
+    from src.figures import probability_bar
+    return probability_bar([stay_probability, churn_probability])
+
+
+@st.cache_resource(max_entries=256)
+def drivers_figure(model_name, version, processed):
+    from src.figures import contribution_bar
+    explainer = get_explainer(model_name)
+    contributions, _ = explainer.explain(processed)
+    top = explainer.top_features(contributions, k=10)[0]
+    columns = get_pipeline().columns
+    return contribution_bar([columns[i] for i in top], contributions[0, top], explainer.units)
+
+
+@st.cache_resource(max_entries=256)
+def what_if_table(model_name, version, threshold, user_data):
+    # Flips are decided on raw scores; probabilities and changes are shown
+    # calibrated, like the rest of the result page.
+    from src.decision import DecisionPolicy
+    from src.what_if import what_if
+    policy = DecisionPolicy({model_name: threshold})
+    base, changes = what_if(user_data, {model_name: get_registry().get(model_name)}, get_pipeline(), policy)
+    calibration = get_calibration()
+    probability = calibration.calibrate(model_name, changes[f"{model_name} probability"].to_numpy())
+    changes[f"{model_name} probability"] = probability
+    changes[f"{model_name} change"] = probability - calibration.calibrate(model_name, base[model_name])
+    return changes
+
+
+@st.cache_data(max_entries=8)
+def csv_bytes(df):
+    # Download payloads are encoded once per result frame, not on every rerun.
+    return df.to_csv(index=False).encode("utf-8")
+
+
+@st.cache_resource
+def start_warmup():
+    registry = get_registry()
+    threading.Thread(target=get_pipeline, name="pipeline-warmup", daemon=True).start()
+    threading.Thread(target=get_cohort_index, name="cohort-warmup", daemon=True).start()
+    threading.Thread(target=get_calibration, name="calibration-warmup", daemon=True).start()
+    return registry.warm()
+
+def get_score_table_job():
+    from src.score_table import get_score_table_job as load_job
+    return load_job(get_registry())
+
+
+@st.cache_resource
+def start_score_table():
+    # Every existing customer is scored in the background from the first
+    # page load; the import runs on that thread too, so no page waits.
+    threading.Thread(target=get_score_table_job, name="score-table-warmup", daemon=True).start()
+
+
+@st.cache_resource
+def start_profiler():
+    # No-op unless CHURN_PROFILE is set; one profiler for the whole server.
+    return start_profiler_from_env()
+
 
-models, columns, scaler = load_resources()
+run_started = time.perf_counter()
+start_profiler()
+registry = get_registry()
+start_score_table()
 
 
 if 'page' not in st.session_state:
@@ -188,9 +315,19 @@ if st.session_state.page == 'intro':
         if st.button("🚀 Start Prediction", use_container_width=True, key="start_btn"):
             st.session_state.page = 'prediction'
             st.rerun()
+        if st.button("🔎 Look Up a Customer", use_container_width=True, key="lookup_btn"):
+            st.session_state.page = 'lookup'
+            st.rerun()
+        if st.button("📂 Score a Customer File", use_container_width=True, key="batch_btn"):
+            st.session_state.page = 'batch'
+            st.rerun()
+        if st.button("📈 Model Performance", use_container_width=True, key="performance_btn"):
+            st.session_state.page = 'performance'
+            st.rerun()
 
 # ==================== PAGE 2: PREDICTION INPUT ====================
 elif st.session_state.page == 'prediction':
+    start_warmup()
     if st.button("🏠 Back to Home", use_container_width=True):
             st.session_state.page = 'intro'
             st.session_state.user_data = None
@@ -272,6 +409,7 @@ elif st.session_state.page == 'prediction':
 
 # ==================== PAGE 3: MODEL SELECTION ====================
 elif st.session_state.page == 'model_selection':
+    start_warmup()
     if st.button("🏠 Back to prediction", use_container_width=True):
             st.session_state.page = 'prediction'
             st.session_state.user_data = None
@@ -292,7 +430,8 @@ elif st.session_state.page == 'model_selection':
             </p>
         </div>
         """, unsafe_allow_html=True)
-        if st.button("Select Logistic Regression", use_container_width=True, key="lr_btn"):
+        if st.button("Select Logistic Regression", use_container_width=True, key="lr_btn",
+                     disabled=not registry.is_available("Logistic Regression")):
             st.session_state.selected_model = 'Logistic Regression'
             st.session_state.page = 'result'
             st.rerun()
@@ -307,7 +446,8 @@ elif st.session_state.page == 'model_selection':
             </p>
         </div>
         """, unsafe_allow_html=True)
-        if st.button("Select Decision Tree", use_container_width=True, key="dt_btn"):
+        if st.button("Select Decision Tree", use_container_width=True, key="dt_btn",
+                     disabled=not registry.is_available("Decision Tree")):
             st.session_state.selected_model = 'Decision Tree'
             st.session_state.page = 'result'
             st.rerun()
@@ -322,15 +462,91 @@ elif st.session_state.page == 'model_selection':
             </p>
         </div>
         """, unsafe_allow_html=True)
-        if st.button("Select Random Forest", use_container_width=True, key="rf_btn"):
+        if st.button("Select Random Forest", use_container_width=True, key="rf_btn",
+                     disabled=not registry.is_available("Random Forest")):
             st.session_state.selected_model = 'Random Forest'
             st.session_state.page = 'result'
             st.rerun()
 
+    st.markdown("<br>", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col2:
+        if st.button("⚖️ Compare All Models", use_container_width=True, key="compare_btn"):
+            st.session_state.page = 'compare'
+            st.rerun()
+
+# ==================== PAGE 4b: MODEL COMPARISON ====================
+elif st.session_state.page == 'compare':
+    import pandas as pd
+    from src.preprocessing import preprocess_input
+    from src.comparison import compare_models
+    from src.figures import model_comparison_bar
+
+    st.markdown("<h1 class='main-title'>⚖️ Model Comparison</h1>", unsafe_allow_html=True)
+    st.markdown("<p class='subtitle'>Every available model scored on the same customer in one pass</p>", unsafe_allow_html=True)
+
+    pipeline = get_pipeline()
+    features = preprocess_input(st.session_state.user_data, pipeline, scale=False)
+    results, total_ms = compare_models(registry.load_all(), features, pipeline, calibration=get_calibration())
+
+    for col, result in zip(st.columns(max(len(results), 1)), results):
+        with col:
+            color = "#ef4444 0%, #dc2626 100%" if result['prediction'] == 1 else "#10b981 0%, #059669 100%"
+            label = "HIGH CHURN RISK" if result['prediction'] == 1 else "LOW CHURN RISK"
+            st.markdown(f"""
+            <div class='card' style='background: linear-gradient(135deg, {color}); color: white; text-align: center;'>
+                <h2 style='font-size: 1.8em; margin-bottom: 10px;'>{result['model']}</h2>
+                <div style='font-size: 3.5em; font-weight: 900;'>{result['calibrated_churn_probability']:.1%}</div>
+                <p style='font-size: 1.2em; margin-top: 10px;'>{label}</p>
+                <p style='font-size: 0.95em; opacity: 0.85;'>{result['inference_ms']:.2f} ms</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+    st.plotly_chart(model_comparison_bar(results, 'calibrated_churn_probability'), use_container_width=True)
+
+    st.dataframe(
+        pd.DataFrame(results).rename(columns={
+            'model': 'Model',
+            'stay_probability': 'Will Stay (raw)',
+            'churn_probability': 'Will Churn (raw)',
+            'calibrated_churn_probability': 'Will Churn (calibrated)',
+            'prediction': 'Prediction',
+            'inference_ms': 'Inference (ms)'
+        }),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"All models scored concurrently in {total_ms:.2f} ms")
+
+    st.markdown("<br><br>", unsafe_allow_html=True)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("🔄 Back to Model Selection", use_container_width=True):
+            st.session_state.page = 'model_selection'
+            st.rerun()
+    with col2:
+        if st.button("📝 New Prediction", use_container_width=True):
+            st.session_state.page = 'prediction'
+            st.session_state.user_data = None
+            st.rerun()
+    with col3:
+        if st.button("🏠 Back to Home", use_container_width=True):
+            st.session_state.page = 'intro'
+            st.session_state.user_data = None
+            st.session_state.selected_model = None
+            st.rerun()
+
 # ==================== PAGE 4: RESULT ====================
 elif st.session_state.page == 'result':
+    import pandas as pd
+    from src.preprocessing import preprocess_input
+    from src.decision import DecisionPolicy
+    from src.figures import what_if_chart
+    from src.what_if import NUMERIC_GRIDS, WHAT_IF_CATEGORICALS, strongest_changes
+
     model_name = st.session_state.selected_model
-    model = models[model_name]
+    model = registry.get(model_name)
+    pipeline = get_pipeline()
     
     model_icons = {
         'Logistic Regression': '📊',
@@ -341,9 +557,19 @@ elif st.session_state.page == 'result':
     st.markdown(f"<h1 class='main-title'>{model_icons[model_name]} {model_name}</h1>", unsafe_allow_html=True)
     st.markdown("<p class='subtitle'>Churn Prediction Results</p>", unsafe_allow_html=True)
     
-    processed = preprocess_input(st.session_state.user_data)
-    prediction = model.predict(processed)[0]
-    prob = model.predict_proba(processed)[0]
+    processed = preprocess_input(st.session_state.user_data, pipeline, scale=needs_scaling(model_name))
+    prediction_cache = get_prediction_cache()
+    prob = prediction_cache.predict_proba(model, processed, model_name, registry.version(model_name))
+    policy = DecisionPolicy.load()
+    threshold = policy.threshold(model_name)
+    prediction = int(prob[1] > threshold)
+    # The decision is taken on the raw score; the probabilities shown are
+    # calibrated to the real churn rate (the models were fitted on
+    # SMOTE-balanced data), with the threshold mapped the same way.
+    calibration = get_calibration()
+    churn_shown = float(calibration.calibrate(model_name, prob[1]))
+    threshold_shown = float(calibration.calibrate(model_name, threshold))
+    shown = [1 - churn_shown, churn_shown]
     
 
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -353,7 +579,7 @@ elif st.session_state.page == 'result':
             <div class='result-card' style='background: linear-gradient(135deg, #ef4444 0%, #dc2626 100%); color: white;'>
                 <div style='font-size: 5em; margin-bottom: 20px;'>⚠️</div>
                 <h1 style='font-size: 3em; margin-bottom: 20px;'>HIGH CHURN RISK</h1>
-                <div style='font-size: 6em; font-weight: 900; margin: 30px 0;'>{prob[1]:.1%}</div>
+                <div style='font-size: 6em; font-weight: 900; margin: 30px 0;'>{shown[1]:.1%}</div>
                 <p style='font-size: 1.4em; margin-top: 20px;'>
                     This customer is likely to churn. Consider retention strategies!
                 </p>
@@ -364,7 +590,7 @@ elif st.session_state.page == 'result':
             <div class='result-card' style='background: linear-gradient(135deg, #10b981 0%, #059669 100%); color: white;'>
                 <div style='font-size: 5em; margin-bottom: 20px;'>✅</div>
                 <h1 style='font-size: 3em; margin-bottom: 20px;'>LOW CHURN RISK</h1>
-                <div style='font-size: 6em; font-weight: 900; margin: 30px 0;'>{prob[0]:.1%}</div>
+                <div style='font-size: 6em; font-weight: 900; margin: 30px 0;'>{shown[0]:.1%}</div>
                 <p style='font-size: 1.4em; margin-top: 20px;'>
                     This customer is likely to stay. Keep up the excellent service!
                 </p>
@@ -375,34 +601,13 @@ elif st.session_state.page == 'result':
     
     col1, col2, col3 = st.columns([1, 2, 1])
     with col2:
-        fig_gauge = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = prob[1] * 100,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Churn Risk Level", 'font': {'size': 24, 'color': 'white'}},
-            delta = {'reference': 50, 'increasing': {'color': "#ef4444"}, 'decreasing': {'color': "#10b981"}},
-            gauge = {
-                'axis': {'range': [None, 100], 'tickwidth': 2, 'tickcolor': "white"},
-                'bar': {'color': "#7e22ce"},
-                'bgcolor': "white",
-                'borderwidth': 2,
-                'bordercolor': "white",
-                'steps': [
-                    {'range': [0, 30], 'color': '#10b981'},
-                    {'range': [30, 70], 'color': '#f59e0b'},
-                    {'range': [70, 100], 'color': '#ef4444'}],
-                'threshold': {
-                    'line': {'color': "white", 'width': 4},
-                    'thickness': 0.75,
-                    'value': prob[1] * 100}}))
-        
-        fig_gauge.update_layout(
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font={'color': "white", 'family': "Arial"},
-            height=400
-        )
+        with span("figure:churn_gauge"):
+            fig_gauge = gauge_figure(churn_shown, threshold_shown)
         st.plotly_chart(fig_gauge, use_container_width=True)
+        st.caption(f"Customers above {threshold_shown:.1%} are flagged as churn risks for {model_name}")
+        if model_name in calibration.calibrators:
+            st.caption(f"Calibrated to the observed churn rate ({calibration.calibrators[model_name].method}); "
+                       f"raw model score {prob[1]:.1%}")
     
     st.markdown("<h2 class='section-header'>📈 Probability Breakdown</h2>", unsafe_allow_html=True)
     
@@ -411,7 +616,7 @@ elif st.session_state.page == 'result':
         st.markdown(f"""
         <div class='card' style='background: linear-gradient(135deg, #10b981 0%, #059669 100%); color: white; text-align: center;'>
             <h2 style='font-size: 2.5em; margin-bottom: 15px;'>Will Stay</h2>
-            <div style='font-size: 4em; font-weight: 900;'>{prob[0]:.1%}</div>
+            <div style='font-size: 4em; font-weight: 900;'>{shown[0]:.1%}</div>
             <p style='font-size: 1.2em; margin-top: 15px;'>Retention Probability</p>
         </div>
         """, unsafe_allow_html=True)
@@ -420,82 +625,111 @@ elif st.session_state.page == 'result':
         st.markdown(f"""
         <div class='card' style='background: linear-gradient(135deg, #ef4444 0%, #dc2626 100%); color: white; text-align: center;'>
             <h2 style='font-size: 2.5em; margin-bottom: 15px;'>Will Churn</h2>
-            <div style='font-size: 4em; font-weight: 900;'>{prob[1]:.1%}</div>
+            <div style='font-size: 4em; font-weight: 900;'>{shown[1]:.1%}</div>
             <p style='font-size: 1.2em; margin-top: 15px;'>Churn Probability</p>
         </div>
         """, unsafe_allow_html=True)
-    
-    st.markdown("<h2 class='section-header'>🎯 Top Features Influencing This Prediction</h2>", unsafe_allow_html=True)
-    
-    if hasattr(model, 'feature_importances_'):
-        importances = model.feature_importances_
-    elif hasattr(model, 'coef_'):
-        importances = np.abs(model.coef_[0])
-    else:
-        importances = np.ones(len(columns))
-    
-
-    feature_df = pd.DataFrame({
-        'Feature': columns,
-        'Importance': importances
-    }).sort_values('Importance', ascending=False).head(10)
-    
 
-    fig_features = px.bar(
-        feature_df,
-        y='Feature',
-        x='Importance',
-        orientation='h',
-        title='Top 10 Most Important Features',
-        color='Importance',
-        color_continuous_scale=['#7e22ce', '#ec4899', '#f59e0b'],
-        labels={'Importance': 'Importance Score', 'Feature': 'Customer Features'}
+    # Everything below the headline is opened one section at a time, so a
+    # rerun only pays for the section on screen (the cohort lookup, the
+    # explanation and the what-if batch are not run until asked for).
+    st.markdown("<br>", unsafe_allow_html=True)
+    detail = st.radio(
+        "Details",
+        ["🎯 Top Features", "👥 Similar Customers", "🔀 What If?", "📊 Probability Distribution"],
+        horizontal=True,
+        key="result_detail",
+        label_visibility="collapsed",
     )
-    
-    fig_features.update_layout(
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.9)',
-        font={'color': "white", 'family': "Arial", 'size': 12},
-        title_font={'size': 20, 'color': 'white'},
-        xaxis={'gridcolor': 'rgba(255,255,255,0.3)'},
-        yaxis={'gridcolor': 'rgba(255,255,255,0.3)'},
-        height=500,
-        showlegend=False
-    )
-    
-    st.plotly_chart(fig_features, use_container_width=True)
-    
+    version = registry.version(model_name)
 
-    st.markdown("<h2 class='section-header'>📊 Probability Distribution</h2>", unsafe_allow_html=True)
-    
-    fig_prob = go.Figure(data=[
-        go.Bar(
-            x=['Will Stay', 'Will Churn'],
-            y=[prob[0] * 100, prob[1] * 100],
-            marker=dict(
-                color=['#10b981', '#ef4444'],
-                line=dict(color='white', width=2)
-            ),
-            text=[f'{prob[0]:.1%}', f'{prob[1]:.1%}'],
-            textposition='outside',
-            textfont=dict(size=20, color='white', family='Arial Black')
-        )
-    ])
-    
-    fig_prob.update_layout(
-        title='Prediction Confidence',
-        paper_bgcolor='rgba(0,0,0,0)',
-        plot_bgcolor='rgba(255,255,255,0.1)',
-        font={'color': "white", 'family': "Arial"},
-        yaxis={'title': 'Probability (%)', 'gridcolor': 'rgba(255,255,255,0.2)', 'range': [0, 100]},
-        xaxis={'title': '', 'showgrid': False},
-        title_font={'size': 20, 'color': 'white'},
-        height=400,
-        showlegend=False
+    if detail == "👥 Similar Customers":
+        st.markdown("<h2 class='section-header'>👥 Similar Existing Customers</h2>", unsafe_allow_html=True)
+
+        cohort = get_cohort_index()
+        x_scaled = processed if needs_scaling(model_name) else pipeline.scale(processed)
+        with span("cohort_lookup"):
+            similar, n_churned = cohort.similar_customers(x_scaled, model_name=model_name)
+            percentile = cohort.percentile(model_name, prob[1])
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"""
+            <div class='card' style='text-align: center;'>
+                <h3 style='color: #7e22ce;'>Risk Percentile</h3>
+                <div style='font-size: 3.5em; font-weight: 900; color: #374151;'>{percentile:.0f}<sup style='font-size: 0.4em;'>th</sup></div>
+                <p style='color: #6b7280;'>Higher churn risk than {percentile:.0f}% of our {len(cohort):,} customers</p>
+            </div>
+            """, unsafe_allow_html=True)
+        with col2:
+            st.markdown(f"""
+            <div class='card' style='text-align: center;'>
+                <h3 style='color: #7e22ce;'>Most Similar Customers</h3>
+                <div style='font-size: 3.5em; font-weight: 900; color: #374151;'>{n_churned} / {len(similar)}</div>
+                <p style='color: #6b7280;'>of the {len(similar)} closest existing customers actually churned</p>
+            </div>
+            """, unsafe_allow_html=True)
+
+        with st.expander("Show the similar customers"):
+            st.dataframe(similar, use_container_width=True, hide_index=True)
+
+    elif detail == "🔀 What If?":
+        st.markdown("<h2 class='section-header'>🔀 What If?</h2>", unsafe_allow_html=True)
+
+        # Every single-field change of this customer, scored in one batch.
+        user_data = st.session_state.user_data
+        with span(f"what_if:{model_name}"):
+            changes = what_if_table(model_name, version, threshold, user_data)
+
+        col1, col2 = st.columns([1, 1])
+        with col1:
+            reducers = strongest_changes(changes, model_name, k=8)
+            st.markdown("**Changes that lower churn risk the most**")
+            if len(reducers):
+                st.dataframe(
+                    pd.DataFrame({
+                        'Field': reducers['feature'],
+                        'Change To': [f"{v:g}" if isinstance(v, float) else str(v) for v in reducers['value']],
+                        'Churn Probability (%)': (reducers[f"{model_name} probability"] * 100).round(2),
+                        'Change (pts)': (reducers[f"{model_name} change"] * 100).round(2),
+                        'Flips Decision': reducers[f"{model_name} flips"],
+                    }),
+                    use_container_width=True,
+                    hide_index=True
+                )
+            else:
+                st.info("No single change lowers this customer's churn risk.")
+        with col2:
+            what_if_fields = list(NUMERIC_GRIDS) + WHAT_IF_CATEGORICALS
+            what_if_feature = st.selectbox("Explore a field", what_if_fields,
+                                           index=what_if_fields.index("Contract"), key="what_if_feature")
+            with span("figure:what_if_chart"):
+                fig_what_if = what_if_chart(changes, model_name, what_if_feature, user_data.get(what_if_feature),
+                                            churn_shown, threshold_shown)
+            st.plotly_chart(fig_what_if, use_container_width=True)
+        st.caption(f"{len(changes)} single-field changes of this customer scored in one {model_name} call; "
+                   "other fields are held at their entered values")
+
+    elif detail == "📊 Probability Distribution":
+        st.markdown("<h2 class='section-header'>📊 Probability Distribution</h2>", unsafe_allow_html=True)
+
+        with span("figure:probability_bar"):
+            fig_probability = probability_figure(shown[0], shown[1])
+        st.plotly_chart(fig_probability, use_container_width=True)
+
+    else:
+        st.markdown("<h2 class='section-header'>🎯 Top Features Influencing This Prediction</h2>", unsafe_allow_html=True)
+
+        with span(f"explain:{model_name}"):
+            fig_features = drivers_figure(model_name, version, processed)
+        st.plotly_chart(fig_features, use_container_width=True)
+
+    cache_stats = prediction_cache.stats()
+    st.caption(
+        f"Prediction cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+        f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['size']} entries)"
     )
     
-    st.plotly_chart(fig_prob, use_container_width=True)
-    
     st.markdown("<br><br>", unsafe_allow_html=True)
     col1, col2, col3 = st.columns(3)
     
@@ -516,3 +750,401 @@ elif st.session_state.page == 'result':
             st.session_state.user_data = None
             st.session_state.selected_model = None
             st.rerun()
+
+# ==================== PAGE 4c: CUSTOMER LOOKUP ====================
+elif st.session_state.page == 'lookup':
+    import pandas as pd
+    from src.decision import DecisionPolicy
+
+    start_warmup()
+    if st.button("🏠 Back to Home", use_container_width=True):
+        st.session_state.page = 'intro'
+        st.rerun()
+
+    st.markdown("<h1 class='main-title'>🔎 Customer Lookup</h1>", unsafe_allow_html=True)
+    st.markdown("<p class='subtitle'>Every existing customer is scored in advance, so results are instant</p>", unsafe_allow_html=True)
+
+    job = get_score_table_job()
+    if job.error is not None:
+        st.error(f"Could not score the customer base: {job.error}")
+        st.stop()
+    if not job.ready:
+        # Poll until the background job finishes; each rerun only reads
+        # its progress counters.
+        st.progress(job.fraction(), text=f"Scoring the customer base... {job.done:,} / {job.total:,} customers")
+        time.sleep(0.3)
+        st.rerun()
+
+    table = job.table
+    st.caption(f"{len(table):,} customers scored by {len(table.models)} models, ready in {job.seconds:.2f}s")
+    customer_id = st.text_input("Customer ID", key="lookup_id", placeholder="e.g. 7590-VHVEG").strip()
+
+    if customer_id:
+        results = table.lookup(customer_id, DecisionPolicy.load())
+        if results is None:
+            matches = table.search(customer_id)
+            if matches:
+                st.info(f"No exact match. Customer IDs starting with {customer_id.upper()}: {', '.join(matches)}")
+            else:
+                st.warning(f"No customer with ID {customer_id}")
+        else:
+            for col, result in zip(st.columns(max(len(results), 1)), results):
+                with col:
+                    color = "#ef4444 0%, #dc2626 100%" if result['prediction'] == 1 else "#10b981 0%, #059669 100%"
+                    label = "HIGH CHURN RISK" if result['prediction'] == 1 else "LOW CHURN RISK"
+                    st.markdown(f"""
+                    <div class='card' style='background: linear-gradient(135deg, {color}); color: white; text-align: center;'>
+                        <h2 style='font-size: 1.8em; margin-bottom: 10px;'>{result['model']}</h2>
+                        <div style='font-size: 3.5em; font-weight: 900;'>{result['calibrated_churn_probability']:.1%}</div>
+                        <p style='font-size: 1.2em; margin-top: 10px;'>{label}</p>
+                        <p style='font-size: 0.95em; opacity: 0.85;'>raw score {result['churn_probability']:.1%}</p>
+                    </div>
+                    """, unsafe_allow_html=True)
+                    if st.button("🔍 Open Full Result", use_container_width=True, key=f"lookup_open_{result['model']}"):
+                        st.session_state.user_data = table.customer(customer_id)
+                        st.session_state.selected_model = result['model']
+                        st.session_state.page = 'result'
+                        st.rerun()
+
+            st.dataframe(pd.DataFrame([table.customer(customer_id)]), use_container_width=True, hide_index=True)
+
+# ==================== PAGE 5: BATCH UPLOAD ====================
+elif st.session_state.page == 'batch':
+    import pandas as pd
+    from src.batch_scoring import ID_COLUMN, UPLOAD_CHUNKSIZE, score_with_drivers
+    from src.monitoring import DriftMonitor
+    from src.preprocessing import missing_input_columns
+    from src.prioritization import CONTEXT_COLUMNS, DEFAULT_TOP_K, SEGMENT_COLUMNS, Prioritizer
+
+    start_warmup()
+    if st.button("🏠 Back to Home", use_container_width=True):
+        st.session_state.page = 'intro'
+        st.rerun()
+
+    st.markdown("<h1 class='main-title'>📂 Batch Scoring</h1>", unsafe_allow_html=True)
+    st.markdown("<p class='subtitle'>Upload a customer file and score every customer at once</p>", unsafe_allow_html=True)
+
+    uploaded = st.file_uploader("Customer CSV with the same columns as the Telco dataset", type="csv")
+    model_name = st.selectbox("Model", registry.available(), key="batch_model_select")
+
+    if uploaded is not None and st.button("⚡ Score File", use_container_width=True, key="score_file_btn"):
+        model = registry.get(model_name)
+        pipeline = get_pipeline()
+        explainer = get_explainer(model_name)
+        calibration = get_calibration()
+
+        # Line count gives the progress denominator without parsing the file.
+        total_rows = max(uploaded.getvalue().count(b"\n") - 1, 1)
+        progress = st.progress(0.0, text="Scoring customers...")
+        parts = []
+        contexts = []
+        scored = 0
+        monitor = DriftMonitor(get_monitoring_profile())
+        start = time.perf_counter()
+
+        uploaded.seek(0)
+        for chunk in pd.read_csv(uploaded, chunksize=UPLOAD_CHUNKSIZE):
+            if scored == 0:
+                missing = missing_input_columns(chunk.columns)
+                if missing:
+                    st.warning(f"Missing columns scored as blank: {', '.join(missing)}")
+
+            part = score_with_drivers(chunk, model_name, model, pipeline, explainer, calibration=calibration)
+            monitor.update(chunk, {model_name: part['churn_probability']})
+            parts.append(part)
+            contexts.append(chunk.reindex(columns=CONTEXT_COLUMNS))
+            scored += len(chunk)
+            progress.progress(min(scored / total_rows, 1.0), text=f"Scored {scored:,} of ~{total_rows:,} customers")
+
+        progress.empty()
+        if parts:
+            st.session_state.batch_results = pd.concat(parts, ignore_index=True)
+            st.session_state.batch_context = pd.concat(contexts, ignore_index=True)
+            st.session_state.batch_summary = {
+                'model': model_name,
+                'file': uploaded.name,
+                'seconds': time.perf_counter() - start,
+            }
+            st.session_state.batch_drift = monitor.report()
+
+    results = st.session_state.get('batch_results')
+    if results is not None:
+        summary = st.session_state.batch_summary
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Customers Scored", f"{len(results):,}")
+        col2.metric("Predicted Churners", f"{int((results['prediction'] == 1).sum()):,}")
+        col3.metric("Expected Churners", f"{results['calibrated_probability'].sum():,.0f}",
+                    help="Sum of the calibrated churn probabilities")
+        col4.metric("Scoring Time", f"{summary['seconds']:.1f} s")
+        st.caption(f"{summary['file']} scored with {summary['model']}")
+
+        drift = st.session_state.get('batch_drift')
+        if drift is not None and len(drift):
+            flagged = drift[drift['status'] != 'ok']
+            if (flagged['status'] == 'drift').any():
+                st.error(f"Data drift: {', '.join(flagged.loc[flagged['status'] == 'drift', 'feature'])} "
+                         "differ from the training data. Scores for this file may be unreliable.")
+            elif len(flagged):
+                st.warning(f"Possible drift in {', '.join(flagged['feature'])}.")
+            with st.expander(f"Data quality & drift vs. training data ({len(flagged)} of {len(drift)} flagged)"):
+                st.dataframe(
+                    drift.rename(columns={
+                        'feature': 'Feature',
+                        'kind': 'Kind',
+                        'rows': 'Rows',
+                        'psi': 'PSI',
+                        'ks': 'KS',
+                        'missing_share': 'Missing',
+                        'out_of_range_share': 'Out of Range',
+                        'unseen_share': 'Unseen Categories',
+                        'unseen_examples': 'Unseen Values',
+                        'status': 'Status',
+                    }).round(4),
+                    use_container_width=True,
+                    hide_index=True
+                )
+                st.caption("PSI above 0.1 or KS above 0.1 is a moderate shift, PSI above 0.25 or KS above 0.2 a "
+                           "large one; out-of-range values fall outside the training min/max; unseen categories "
+                           "are encoded as all zeros")
+
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            top_percent = st.slider("Show the highest-risk % of customers", 1, 100, 100, key="batch_top_percent")
+        with col2:
+            churners_only = st.checkbox("Predicted churners only", key="batch_churners_only")
+
+        view = results
+        if churners_only:
+            view = view[view['prediction'] == 1]
+        n_shown = -(-len(view) * top_percent // 100)
+        view = view.nlargest(n_shown, 'churn_probability')
+
+        display = view.head(BATCH_DISPLAY_ROWS).rename(columns={
+            'churn_probability': 'Churn Probability',
+            'calibrated_probability': 'Calibrated Probability',
+            'prediction': 'Prediction',
+            'top_risk_drivers': 'Top Risk Drivers',
+        })
+        st.dataframe(
+            display,
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'Churn Probability': st.column_config.ProgressColumn(
+                    'Churn Probability', format="percent", min_value=0.0, max_value=1.0),
+                'Calibrated Probability': st.column_config.ProgressColumn(
+                    'Calibrated Probability', format="percent", min_value=0.0, max_value=1.0),
+            },
+        )
+        if len(view) > BATCH_DISPLAY_ROWS:
+            st.caption(f"Showing the first {BATCH_DISPLAY_ROWS:,} of {len(view):,} customers; the download has all of them.")
+
+        col1, col2 = st.columns(2)
+        with col1:
+            st.download_button(
+                "⬇️ Download Filtered Results",
+                csv_bytes(view),
+                file_name="churn_scores_filtered.csv",
+                mime="text/csv",
+                use_container_width=True,
+            )
+        with col2:
+            st.download_button(
+                "⬇️ Download All Results",
+                csv_bytes(results),
+                file_name="churn_scores.csv",
+                mime="text/csv",
+                use_container_width=True,
+            )
+
+        context = st.session_state.get('batch_context')
+        if context is not None and len(context) == len(results):
+            st.markdown("<h2 class='section-header'>🎯 Retention Call List</h2>", unsafe_allow_html=True)
+
+            col1, col2, col3 = st.columns([1, 2, 1])
+            with col1:
+                top_k = st.number_input("Customers to call", 1, len(results), min(DEFAULT_TOP_K, len(results)),
+                                        step=100, key="call_list_k")
+            with col2:
+                segment_by = st.multiselect("Segment by", list(SEGMENT_COLUMNS), key="call_list_segments")
+            with col3:
+                per_segment = st.checkbox("Top customers within each segment", key="call_list_per_segment",
+                                          disabled=not segment_by)
+
+            # Expected loss = calibrated churn probability x MonthlyCharges x
+            # the decision policy's months lost per churner.
+            prioritizer = Prioritizer(int(top_k), segment_by=segment_by, per_segment=per_segment)
+            frame = context.assign(**{ID_COLUMN: results[ID_COLUMN]}) if ID_COLUMN in results.columns else context
+            prioritizer.update(frame, results['calibrated_probability'], results['prediction'])
+            calls = prioritizer.call_list()
+            segments = prioritizer.segment_summary()
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("On the Call List", f"{len(calls):,}")
+            col2.metric("Expected Loss on the List", f"${calls['expected_loss'].sum():,.0f}")
+            col3.metric("Share of All Expected Loss",
+                        f"{calls['expected_loss'].sum() / max(segments['expected_loss'].sum(), 1e-12):.1%}")
+
+            st.dataframe(
+                segments.rename(columns={
+                    'segment': 'Segment',
+                    'customers': 'Customers',
+                    'expected_churners': 'Expected Churners',
+                    'monthly_revenue': 'Monthly Revenue',
+                    'expected_loss': 'Expected Loss',
+                    'mean_churn_probability': 'Mean Churn Probability',
+                    'share_of_expected_loss': 'Share of Expected Loss',
+                    'in_call_list': 'On the Call List',
+                    'call_list_loss': 'Expected Loss on the List',
+                }).round(3),
+                use_container_width=True,
+                hide_index=True
+            )
+            st.dataframe(
+                calls.head(BATCH_DISPLAY_ROWS).rename(columns={
+                    'rank': 'Rank',
+                    'segment_rank': 'Rank in Segment',
+                    'row': 'Row',
+                    'churn_probability': 'Churn Probability',
+                    'prediction': 'Prediction',
+                    'expected_loss': 'Expected Loss',
+                }),
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    'Churn Probability': st.column_config.ProgressColumn(
+                        'Churn Probability', format="percent", min_value=0.0, max_value=1.0),
+                    'Expected Loss': st.column_config.NumberColumn('Expected Loss', format="$%.0f"),
+                },
+            )
+            st.caption(f"Expected loss is the calibrated churn probability × MonthlyCharges × "
+                       f"{prioritizer.horizon_months:g} months (the decision policy's months lost per churner)")
+            st.download_button(
+                "⬇️ Download Call List",
+                csv_bytes(calls),
+                file_name="retention_call_list.csv",
+                mime="text/csv",
+                use_container_width=True,
+            )
+
+# ==================== PAGE 6: MODEL PERFORMANCE ====================
+elif st.session_state.page == 'performance':
+    import pandas as pd
+    from src.decision import DecisionPolicy, optimal_policy
+    from src.evaluation import REPORT_THRESHOLDS
+    from src.figures import (calibration_plot, confusion_heatmap, gains_chart, pr_curves,
+                             retention_value_curves, roc_curves)
+
+    if st.button("🏠 Back to Home", use_container_width=True):
+        st.session_state.page = 'intro'
+        st.rerun()
+
+    st.markdown("<h1 class='main-title'>📈 Model Performance</h1>", unsafe_allow_html=True)
+    st.markdown("<p class='subtitle'>Every model evaluated on the same held-out customers</p>", unsafe_allow_html=True)
+
+    reports = get_evaluation_reports()
+    n_holdout = len(next(iter(reports.values())).y) if reports else 0
+
+    summary = pd.DataFrame([{'Model': name, **report.summary()} for name, report in reports.items()])
+    st.dataframe(
+        summary.rename(columns={
+            'roc_auc': 'ROC AUC',
+            'average_precision': 'Avg Precision',
+            'brier': 'Brier Score',
+            'accuracy': 'Accuracy',
+            'precision': 'Precision',
+            'recall': 'Recall',
+            'f1': 'F1',
+        }).round(4),
+        use_container_width=True,
+        hide_index=True
+    )
+    st.caption(f"{n_holdout:,} held-out customers; classification metrics at a 0.5 threshold")
+
+    roc_tab, pr_tab, calibration_tab, gains_tab, threshold_tab, value_tab = st.tabs(
+        ["ROC", "Precision-Recall", "Calibration", "Lift & Gain", "Thresholds", "Retention Value"]
+    )
+    with roc_tab:
+        st.plotly_chart(roc_curves(reports), use_container_width=True)
+    with pr_tab:
+        st.plotly_chart(pr_curves(reports), use_container_width=True)
+    with calibration_tab:
+        st.plotly_chart(calibration_plot(reports), use_container_width=True)
+    with gains_tab:
+        st.plotly_chart(gains_chart(reports), use_container_width=True)
+        gains_model = st.selectbox("Lift table for", list(reports), key="gains_model")
+        st.dataframe(reports[gains_model].gains().round(3), use_container_width=True, hide_index=True)
+    with threshold_tab:
+        col1, col2 = st.columns([1, 2])
+        with col1:
+            threshold_model = st.selectbox("Model", list(reports), key="threshold_model")
+            threshold = st.slider("Churn threshold", 0.05, 0.95, 0.5, 0.05, key="performance_threshold")
+            at = reports[threshold_model].confusion([threshold]).iloc[0]
+            st.metric("Precision", f"{at['precision']:.1%}")
+            st.metric("Recall", f"{at['recall']:.1%}")
+            st.metric("F1", f"{at['f1']:.3f}")
+        with col2:
+            st.plotly_chart(confusion_heatmap(int(at['tn']), int(at['fp']), int(at['fn']), int(at['tp'])),
+                            use_container_width=True)
+        st.dataframe(reports[threshold_model].confusion(REPORT_THRESHOLDS).round(3),
+                     use_container_width=True, hide_index=True)
+    with value_tab:
+        current = DecisionPolicy.load()
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            offer_cost = st.number_input("Offer cost per customer ($)", 0.0, 1000.0, current.offer_cost, 5.0)
+        with col2:
+            save_rate = st.number_input("Share of churners the offer keeps", 0.0, 1.0, current.save_rate, 0.05)
+        with col3:
+            loss_months = st.number_input("Months of MonthlyCharges lost per churner", 1.0, 120.0,
+                                          current.loss_months, 1.0)
+
+        sweeps = get_retention_sweeps()
+        policy, optima = optimal_policy(sweeps, offer_cost, save_rate, loss_months)
+        curves = {name: sweep.curve(offer_cost, save_rate, loss_months) for name, sweep in sweeps.items()}
+        st.plotly_chart(retention_value_curves(curves, optima), use_container_width=True)
+
+        st.dataframe(pd.DataFrame([{
+            'Model': name,
+            'Best Threshold': best['threshold'],
+            'Value ($)': best['value'],
+            'Value at Current Threshold ($)': sweeps[name].value_at(current.threshold(name), offer_cost,
+                                                                   save_rate, loss_months),
+            'Contacted': f"{best['share_targeted']:.1%}",
+            'Precision': best['precision'],
+            'Recall': best['recall'],
+        } for name, best in optima.items()]).round(3), use_container_width=True, hide_index=True)
+        st.caption("Value = save rate × months × MonthlyCharges of the churners contacted − offer cost × "
+                   f"customers contacted, over the {n_holdout:,} held-out customers")
+
+        if st.button("✅ Apply these thresholds", use_container_width=True):
+            policy.save()
+            st.success("Saved. Single, compare and batch predictions now use these thresholds.")
+
+# ==================== DEBUG: PIPELINE TIMINGS ====================
+# Only with CHURN_METRICS=1; otherwise the spans above are no-ops.
+if METRICS.enabled:
+    import pandas as pd
+    from src.metrics import get_profiler
+
+    METRICS.observe(f"page:{st.session_state.page}", time.perf_counter() - run_started)
+
+    # The sidebar is hidden by the page CSS, so the panel sits at the
+    # bottom of the page.
+    with st.expander("⏱ Pipeline Timings"):
+        timings = pd.DataFrame(METRICS.summary())
+        if len(timings):
+            st.dataframe(timings.round(3), use_container_width=True, hide_index=True)
+        st.caption("p50/p95 are histogram bucket upper bounds")
+        st.download_button("Download Prometheus metrics", METRICS.prometheus_text(), "metrics.prom",
+                           mime="text/plain")
+        if st.button("Write metrics file", key="write_metrics"):
+            st.caption(f"Wrote {METRICS.write_prometheus()}")
+        if st.button("Reset timings", key="reset_metrics"):
+            METRICS.reset()
+
+        profiler = get_profiler()
+        if profiler is not None:
+            st.caption(f"Sampling profiler: {profiler.samples:,} samples")
+            st.download_button("Download profile (collapsed stacks)", profiler.collapsed(), "profile.folded",
+                               mime="text/plain")
@@ -0,0 +1,345 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.model_training import ModelRegistry, needs_scaling
+from src.preprocessing import get_feature_pipeline, preprocess_input
+
+DATA_PATH = "data/Telco-Customer-Churn.csv"
+RESULTS_DIR = os.path.join("benchmarks", "results")
+BATCH_SIZES = [1, 100, 10_000, 1_000_000]
+TREE_ENGINE_SIZES = [1, 100_000]
+PARALLEL_ROWS = 10_000_000
+
+COLD_LOAD_SNIPPET = """
+import json, time
+start = time.perf_counter()
+from src.model_training import load_all_models
+models = load_all_models()
+print(json.dumps({"seconds": time.perf_counter() - start, "models": list(models)}))
+"""
+
+
+def synthesize(n_rows, seed=0):
+    # Resample the real customer base with replacement to reach n_rows.
+    base = pd.read_csv(DATA_PATH)
+    index = np.random.default_rng(seed).integers(0, len(base), size=n_rows)
+    return base.iloc[index].reset_index(drop=True)
+
+
+def summarize(latencies, rows_per_call=1):
+    latencies = np.asarray(latencies)
+    total = latencies.sum()
+    return {
+        "calls": int(len(latencies)),
+        "rows_per_call": rows_per_call,
+        "mean_ms": float(latencies.mean() * 1000),
+        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+        "p95_ms": float(np.percentile(latencies, 95) * 1000),
+        "p99_ms": float(np.percentile(latencies, 99) * 1000),
+        "rows_per_sec": float(rows_per_call * len(latencies) / total) if total > 0 else 0.0,
+    }
+
+
+def measure(fn, rows_per_call=1, min_calls=5, min_seconds=1.0, max_calls=100_000):
+    fn()  # warm-up
+
+    latencies = []
+    deadline = time.perf_counter() + min_seconds
+    while len(latencies) < max_calls and (len(latencies) < min_calls or time.perf_counter() < deadline):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+
+    result = summarize(latencies, rows_per_call)
+
+    tracemalloc.start()
+    fn()
+    result["peak_memory_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+    tracemalloc.stop()
+
+    return result
+
+
+def bench_preprocessing(pipeline, frames):
+    results = {}
+    record = frames[min(frames)].drop(columns=["customerID", "Churn"]).iloc[0].to_dict()
+
+    results["preprocess_input"] = measure(lambda: preprocess_input(record, pipeline))
+
+    for size, frame in frames.items():
+        results[f"encode_frame[{size}]"] = measure(
+            lambda frame=frame: pipeline.encode_frame(frame, scale=False),
+            rows_per_call=size, min_calls=3 if size < 1_000_000 else 1,
+        )
+
+    return results
+
+
+def bench_inference(registry, pipeline, frames):
+    from src.calibration import load_calibration
+
+    results = {}
+    calibration = load_calibration(registry=registry, pipeline=pipeline)
+
+    for size, frame in frames.items():
+        X = pipeline.encode_frame(frame, scale=False)
+        X_scaled = pipeline.scale(X)
+
+        for name in registry.available():
+            model = registry.get(name)
+            X_model = X_scaled if needs_scaling(name) else X
+            results[f"{name}.predict_proba[{size}]"] = measure(
+                lambda model=model, X_model=X_model: model.predict_proba(X_model),
+                rows_per_call=size, min_calls=3 if size < 1_000_000 else 1,
+            )
+            prob = model.predict_proba(X_model)[:, 1]
+            results[f"{name}.calibrate[{size}]"] = measure(
+                lambda name=name, prob=prob: calibration.calibrate(name, prob), rows_per_call=size,
+            )
+
+    return results
+
+
+def bench_tree_engine(pipeline):
+    # sklearn predict_proba vs the lockstep NumPy traversal, with no
+    # fallback to sklearn for large batches.
+    from src.tree_engine import TreeEnsemblePredictor
+
+    results = {}
+    registry = ModelRegistry(engine="sklearn")
+    frame = synthesize(max(TREE_ENGINE_SIZES))
+    X = pipeline.encode_frame(frame, scale=False)
+
+    for name in registry.available():
+        model = registry.get(name)
+        if needs_scaling(name):
+            continue
+        native = TreeEnsemblePredictor.from_model(model, max_native_rows=np.inf)
+
+        for size in TREE_ENGINE_SIZES:
+            X_size = X[:size]
+            for engine, predictor in (("sklearn", model), ("native", native)):
+                results[f"{name}.{engine}[{size}]"] = measure(
+                    lambda predictor=predictor, X_size=X_size: predictor.predict_proba(X_size),
+                    rows_per_call=size, min_calls=3,
+                )
+
+    return results
+
+
+def write_synthetic_csv(path, n_rows, block=1_000_000):
+    # Written a block at a time so 10M rows never sit in memory at once.
+    for offset in range(0, n_rows, block):
+        frame = synthesize(min(block, n_rows - offset), seed=offset)
+        frame.to_csv(path, mode="a" if offset else "w", header=offset == 0, index=False)
+
+
+def bench_parallel_scoring(n_rows, worker_counts):
+    # End-to-end score_file throughput (parse, encode, score, write) on a
+    # synthetic file; speedup is relative to the first worker count.
+    from src.batch_scoring import score_file
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        input_path = os.path.join(directory, "customers.csv")
+        output_path = os.path.join(directory, "scores.csv")
+        write_synthetic_csv(input_path, n_rows)
+
+        baseline = None
+        for workers in worker_counts:
+            stats = score_file(input_path, output_path, workers=workers)
+            baseline = baseline or stats["seconds"]
+            results[f"score_file {n_rows:,} rows, {workers} worker(s)"] = {
+                "calls": 1,
+                "workers": workers,
+                "mean_ms": stats["seconds"] * 1000,
+                "rows_per_sec": stats["rows_per_sec"],
+                "speedup": baseline / stats["seconds"],
+            }
+
+    return results
+
+
+def bench_cold_load():
+    runs = []
+    for _ in range(3):
+        output = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", COLD_LOAD_SNIPPET],
+            capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    seconds = [run["seconds"] for run in runs]
+    return {
+        "load_all_models (cold process)": {
+            "calls": len(seconds),
+            "models": runs[0]["models"],
+            "mean_ms": float(np.mean(seconds) * 1000),
+            "min_ms": float(np.min(seconds) * 1000),
+            "max_ms": float(np.max(seconds) * 1000),
+        }
+    }
+
+
+def bench_figures(pipeline):
+    from src.figures import churn_gauge, contribution_bar, probability_bar
+
+    prob = np.array([0.27, 0.73])
+    features = pipeline.columns[:10]
+    contributions = np.linspace(-0.5, 0.5, 10)
+
+    return {
+        "figure.churn_gauge": measure(lambda: churn_gauge(prob[1])),
+        "figure.contribution_bar": measure(lambda: contribution_bar(features, contributions, "probability")),
+        "figure.probability_bar": measure(lambda: probability_bar(prob)),
+    }
+
+
+def bench_metrics(pipeline):
+    # Cost of the timing spans around a single-row encode, off and on.
+    from src.metrics import METRICS, enable, span
+
+    row = synthesize(1).iloc[0].to_dict()
+    was_enabled = METRICS.enabled
+    results = {}
+    try:
+        for state in ("off", "on"):
+            enable(state == "on")
+            results[f"metrics.span_{state}"] = measure(lambda: span("bench").__enter__().__exit__())
+            results[f"metrics.preprocess_input_{state}"] = measure(lambda: preprocess_input(row, pipeline))
+    finally:
+        enable(was_enabled)
+        METRICS.reset()
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def environment():
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "scikit-learn": sklearn.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run(batch_sizes, suites, parallel_rows=PARALLEL_ROWS, worker_counts=None):
+    warnings.filterwarnings("ignore")
+
+    registry = ModelRegistry()
+    pipeline = get_feature_pipeline()
+    frames = {size: synthesize(size) for size in batch_sizes}
+
+    results = {}
+    if "preprocessing" in suites:
+        results.update(bench_preprocessing(pipeline, frames))
+    if "inference" in suites:
+        results.update(bench_inference(registry, pipeline, frames))
+    if "tree_engine" in suites:
+        results.update(bench_tree_engine(pipeline))
+    if "cold_load" in suites:
+        results.update(bench_cold_load())
+    if "figures" in suites:
+        results.update(bench_figures(pipeline))
+    if "metrics" in suites:
+        results.update(bench_metrics(pipeline))
+    if "parallel_scoring" in suites:
+        if worker_counts is None:
+            cores = os.cpu_count() or 1
+            worker_counts = sorted({1, *[2 ** k for k in range(1, cores.bit_length()) if 2 ** k <= cores], cores})
+        results.update(bench_parallel_scoring(parallel_rows, worker_counts))
+
+    return {
+        "commit": git_commit(),
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "environment": environment(),
+        "results": results,
+    }
+
+
+def print_report(report):
+    print(f"commit {report['commit']}  {report['timestamp']}")
+    for name, result in report["results"].items():
+        if "p50_ms" in result:
+            print(f"  {name:<45} p50 {result['p50_ms']:10.3f} ms  p99 {result['p99_ms']:10.3f} ms  "
+                  f"{result['rows_per_sec']:14,.0f} rows/s  peak {result['peak_memory_mb']:8.1f} MB")
+        elif "speedup" in result:
+            print(f"  {name:<45} {result['mean_ms'] / 1000:9.1f} s  {result['rows_per_sec']:14,.0f} rows/s  "
+                  f"{result['speedup']:5.2f}x")
+        else:
+            print(f"  {name:<45} mean {result['mean_ms']:9.1f} ms")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{old['commit']} -> {new['commit']}")
+    for name, result in new["results"].items():
+        before = old["results"].get(name)
+        if before is None:
+            continue
+        key = "p50_ms" if "p50_ms" in result else "mean_ms"
+        change = result[key] / before[key] if before[key] else float("nan")
+        print(f"  {name:<45} {before[key]:10.3f} -> {result[key]:10.3f} ms  ({change:5.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark preprocessing, inference and rendering paths.")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=BATCH_SIZES)
+    parser.add_argument("--suites", nargs="+", default=["preprocessing", "inference", "tree_engine", "cold_load", "figures", "metrics"])
+    parser.add_argument("--parallel-rows", type=int, default=PARALLEL_ROWS,
+                        help="Rows in the synthetic file for the parallel_scoring suite (not run by default)")
+    parser.add_argument("--workers", type=int, nargs="+", default=None,
+                        help="Worker counts for parallel_scoring (default: 1, 2, 4, ... up to every core)")
+    parser.add_argument("--output", default=None, help="JSON file to write (default: benchmarks/results/<commit>-<time>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two saved result files")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    report = run(args.batch_sizes, args.suites, args.parallel_rows, args.workers)
+    print_report(report)
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = report["timestamp"].replace(":", "").replace("-", "")
+        output = os.path.join(RESULTS_DIR, f"{report['commit']}-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+
+if __name__ == "__main__":
+    main()
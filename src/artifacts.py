@@ -0,0 +1,241 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from src.model_training import BASE_PATH, COMPILED_DIR, MODEL_FILES, ModelRegistry
+from src.preprocessing import FeaturePipeline, get_feature_pipeline
+from src.tree_engine import PackedTrees, TreeEnsemblePredictor, is_tree_model
+
+FORMAT_NAME = "churn-compiled-models"
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+
+
+class StaleArtifactError(Exception):
+    pass
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_record(path):
+    stat = os.stat(path)
+    return {
+        "file": os.path.basename(path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "sha256": file_sha256(path),
+    }
+
+
+def _save_array(directory, prefix, name, array):
+    file_name = f"{prefix}.{name}.npy"
+    path = os.path.join(directory, file_name)
+    np.save(path, np.ascontiguousarray(array))
+    return file_name, {
+        "dtype": str(array.dtype),
+        "shape": list(array.shape),
+        "sha256": file_sha256(path),
+    }
+
+
+def _model_arrays(model):
+    if hasattr(model, "coef_"):
+        return "linear", {
+            "coef": np.asarray(model.coef_, dtype=np.float64),
+            "intercept": np.asarray(model.intercept_, dtype=np.float64),
+        }, {}
+
+    if is_tree_model(model):
+        estimators = model.estimators_ if hasattr(model, "estimators_") else [model]
+        trees = PackedTrees.from_estimators(estimators)
+        return "trees", trees.to_arrays(), {"max_depth": trees.max_depth}
+
+    raise TypeError(f"Cannot export model of type {type(model).__name__}")
+
+
+def export_artifacts(output_dir=COMPILED_DIR, registry=None, pipeline=None):
+    # Converts every available pickled model into flat .npy arrays plus a
+    # manifest recording the format version, array checksums and the
+    # checksum of each source pickle (used to detect stale exports).
+    # Always export from the pickles, never from a previous export.
+    registry = ModelRegistry(engine="sklearn") if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+    os.makedirs(output_dir, exist_ok=True)
+
+    manifest = {
+        "format": FORMAT_NAME,
+        "format_version": FORMAT_VERSION,
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "pipeline": pipeline.to_dict(),
+        "models": {},
+    }
+
+    for name in registry.available():
+        model = registry.get(name)
+        kind, arrays, extra = _model_arrays(model)
+        prefix = os.path.splitext(MODEL_FILES[name])[0]
+
+        entry = {
+            "kind": kind,
+            "classes": np.asarray(model.classes_).tolist(),
+            "source": _source_record(registry.paths[name]),
+            "arrays": {},
+            **extra,
+        }
+        for array_name, array in arrays.items():
+            file_name, record = _save_array(output_dir, prefix, array_name, array)
+            entry["arrays"][array_name] = {"file": file_name, **record}
+
+        manifest["models"][name] = entry
+
+    with open(os.path.join(output_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    return manifest
+
+
+def load_manifest(path=COMPILED_DIR):
+    with open(os.path.join(path, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    if manifest.get("format") != FORMAT_NAME or manifest.get("format_version") != FORMAT_VERSION:
+        raise StaleArtifactError(
+            f"Unsupported compiled artifact format {manifest.get('format')!r} "
+            f"v{manifest.get('format_version')} (expected {FORMAT_NAME} v{FORMAT_VERSION})"
+        )
+
+    return manifest
+
+
+def stale_models(path=COMPILED_DIR, base_path=BASE_PATH):
+    # Names whose source pickle changed (or vanished) since the export.
+    manifest = load_manifest(path)
+    return [name for name, entry in manifest["models"].items() if _is_stale(entry, base_path)]
+
+
+def verify_arrays(path=COMPILED_DIR):
+    manifest = load_manifest(path)
+    corrupt = []
+
+    for name, entry in manifest["models"].items():
+        for record in entry["arrays"].values():
+            if file_sha256(os.path.join(path, record["file"])) != record["sha256"]:
+                corrupt.append(name)
+                break
+
+    return corrupt
+
+
+class CompiledLinearModel:
+
+    def __init__(self, classes, coef, intercept):
+        self.classes_ = np.asarray(classes)
+        self.coef_ = coef
+        self.intercept_ = intercept
+
+    def decision_function(self, X):
+        return (X @ self.coef_.T + self.intercept_).ravel()
+
+    def predict_proba(self, X):
+        from scipy.special import expit
+
+        prob = expit(self.decision_function(np.asarray(X, dtype=np.float64)))
+        return np.stack([1 - prob, prob], axis=1)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def _is_stale(entry, base_path):
+    # The cheap size/mtime check runs first; the pickle is only rehashed
+    # when that differs, so a fresh checkout is not reported as stale.
+    source = entry["source"]
+    source_path = os.path.join(base_path, source["file"])
+    if not os.path.exists(source_path):
+        return True
+
+    stat = os.stat(source_path)
+    if stat.st_size == source["size"] and stat.st_mtime_ns == source["mtime_ns"]:
+        return False
+    return file_sha256(source_path) != source["sha256"]
+
+
+def _build_model(entry, path, mmap_mode):
+    # Arrays are memory-mapped read-only, so every worker process that
+    # loads the same export shares the same physical pages.
+    arrays = {
+        array_name: np.load(os.path.join(path, record["file"]), mmap_mode=mmap_mode)
+        for array_name, record in entry["arrays"].items()
+    }
+    if entry["kind"] == "linear":
+        return CompiledLinearModel(entry["classes"], arrays["coef"], arrays["intercept"])
+
+    trees = PackedTrees(**arrays, max_depth=entry["max_depth"])
+    return TreeEnsemblePredictor(entry["classes"], trees)
+
+
+def load_compiled_model(name, path=COMPILED_DIR, base_path=BASE_PATH, mmap_mode="r"):
+    # None when there is no usable export for this model; raises
+    # StaleArtifactError when the export no longer matches its pickle.
+    if not os.path.exists(os.path.join(path, MANIFEST_FILE)):
+        return None
+
+    entry = load_manifest(path)["models"].get(name)
+    if entry is None:
+        return None
+    if _is_stale(entry, base_path):
+        raise StaleArtifactError(
+            f"Compiled artifact for {name} is out of date. Re-run `python -m src.artifacts`."
+        )
+
+    return _build_model(entry, path, mmap_mode)
+
+
+def load_compiled_models(path=COMPILED_DIR, base_path=BASE_PATH, mmap_mode="r"):
+    manifest = load_manifest(path)
+
+    stale = stale_models(path, base_path)
+    if stale:
+        raise StaleArtifactError(
+            f"Compiled artifacts are out of date for: {', '.join(stale)}. "
+            "Re-run `python -m src.artifacts`."
+        )
+
+    models = {
+        name: _build_model(entry, path, mmap_mode)
+        for name, entry in manifest["models"].items()
+    }
+    return models, FeaturePipeline.from_dict(manifest["pipeline"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the pickled models to memory-mappable arrays.")
+    parser.add_argument("--output-dir", default=COMPILED_DIR)
+    parser.add_argument("--check", action="store_true", help="Only report stale or corrupt exports")
+    args = parser.parse_args()
+
+    if args.check:
+        stale = stale_models(args.output_dir)
+        corrupt = verify_arrays(args.output_dir)
+        print(f"stale: {stale or 'none'}  corrupt: {corrupt or 'none'}")
+        raise SystemExit(1 if stale or corrupt else 0)
+
+    manifest = export_artifacts(args.output_dir)
+    for name, entry in manifest["models"].items():
+        size = sum(np.prod(a["shape"]) * np.dtype(a["dtype"]).itemsize for a in entry["arrays"].values())
+        print(f"{name:<20} {entry['kind']:<7} {size / 1e3:10.1f} KB")
+    print(f"Wrote {os.path.join(args.output_dir, MANIFEST_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from src.calibration import load_calibration
+from src.decision import DecisionPolicy
+from src.metrics import span
+from src.model_training import ENGINES, load_all_models, needs_scaling
+from src.preprocessing import load_feature_pipeline
+
+# Whole chunks are scored at once, where sklearn's compiled traversal is
+# the faster engine for tree models.
+BATCH_ENGINE = "sklearn"
+ID_COLUMN = "customerID"
+TARGET_COLUMN = "Churn"
+DEFAULT_CHUNKSIZE = 100_000
+# Smaller chunks for the app's upload page so the progress bar moves.
+UPLOAD_CHUNKSIZE = 5_000
+
+
+def model_slug(model_name):
+    return model_name.lower().replace(" ", "_")
+
+
+def read_chunks(path, chunksize=DEFAULT_CHUNKSIZE):
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunksize)
+
+
+def score_matrix(X, models, pipeline, policy=None, calibration=None):
+    # X is the unscaled feature matrix; it is scaled once, only if a model
+    # that needs it is being scored. Predictions use the saved decision
+    # policy's threshold for each model, on the raw probability; given a
+    # src.calibration.Calibration, calibrated probabilities are added.
+    policy = DecisionPolicy.load() if policy is None else policy
+    scores = {}
+    X_scaled = None
+
+    for name, model in models.items():
+        with span(f"predict_proba:{name}"):
+            if needs_scaling(name):
+                if X_scaled is None:
+                    X_scaled = pipeline.scale(X)
+                prob = model.predict_proba(X_scaled)
+            else:
+                prob = model.predict_proba(X)
+        slug = model_slug(name)
+        scores[f"{slug}_probability"] = prob[:, 1]
+        if calibration is not None:
+            scores[f"{slug}_calibrated_probability"] = calibration.calibrate(name, prob[:, 1])
+        scores[f"{slug}_prediction"] = policy.decide(name, prob[:, 1])
+
+    return scores
+
+
+def score_frame(df, models, pipeline, policy=None, calibration=None):
+    X = pipeline.encode_frame(df, scale=False)
+
+    result = pd.DataFrame(score_matrix(X, models, pipeline, policy, calibration), index=df.index)
+    if ID_COLUMN in df.columns:
+        result.insert(0, ID_COLUMN, df[ID_COLUMN].to_numpy())
+
+    return result
+
+
+def score_with_drivers(df, name, model, pipeline, explainer, n_drivers=3, policy=None, calibration=None):
+    # One model's score plus each customer's strongest churn drivers.
+    policy = DecisionPolicy.load() if policy is None else policy
+    X = pipeline.encode_frame(df, scale=needs_scaling(name))
+    prob = model.predict_proba(X)
+    contributions, _ = explainer.explain(X)
+
+    result = pd.DataFrame({
+        "churn_probability": prob[:, 1],
+        "prediction": policy.decide(name, prob[:, 1]),
+        "top_risk_drivers": explainer.risk_drivers(contributions, n_drivers),
+    }, index=df.index)
+    if calibration is not None:
+        result.insert(1, "calibrated_probability", calibration.calibrate(name, prob[:, 1]))
+    if ID_COLUMN in df.columns:
+        result.insert(0, ID_COLUMN, df[ID_COLUMN].to_numpy())
+
+    return result
+
+
+class ScoresWriter:
+
+    def __init__(self, path):
+        self.path = path
+        self.is_parquet = path.endswith(".parquet")
+        self._writer = None
+        self._wrote_header = False
+
+    def write(self, df):
+        if self.is_parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a" if self._wrote_header else "w",
+                      header=not self._wrote_header, index=False)
+            self._wrote_header = True
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(input_path, output_path, model_names=None, chunksize=DEFAULT_CHUNKSIZE,
+               models=None, pipeline=None, engine=BATCH_ENGINE, workers=1, monitor=None, calibrate=True):
+    # monitor: optional src.monitoring.DriftMonitor fed every chunk and its scores.
+    # calibrate adds each model's calibrated probability next to the raw one.
+    if workers != 1:
+        from src.parallel_scoring import score_file_parallel
+
+        return score_file_parallel(input_path, output_path, model_names, chunksize, workers, engine,
+                                   models, pipeline, monitor, calibrate)
+
+    if models is None:
+        models = load_all_models(engine)
+    if model_names is not None:
+        models = {name: models[name] for name in model_names}
+    if pipeline is None:
+        pipeline = load_feature_pipeline()
+    policy = DecisionPolicy.load()
+    calibration = load_calibration() if calibrate else None
+
+    timings = {"read": 0.0, "score": 0.0, "write": 0.0}
+    n_rows = 0
+    writer = ScoresWriter(output_path)
+    start = time.perf_counter()
+
+    try:
+        chunks = read_chunks(input_path, chunksize)
+        while True:
+            t0 = time.perf_counter()
+            chunk = next(chunks, None)
+            t1 = time.perf_counter()
+            timings["read"] += t1 - t0
+            if chunk is None:
+                break
+
+            result = score_frame(chunk, models, pipeline, policy, calibration)
+            if monitor is not None:
+                monitor.update(chunk, {name: result[f"{model_slug(name)}_probability"] for name in models})
+            t2 = time.perf_counter()
+            timings["score"] += t2 - t1
+
+            writer.write(result)
+            timings["write"] += time.perf_counter() - t2
+            n_rows += len(chunk)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+
+    return {
+        "rows": n_rows,
+        "models": list(models),
+        "seconds": elapsed,
+        "rows_per_sec": n_rows / elapsed if elapsed > 0 else 0.0,
+        "stage_seconds": timings,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a customer file with the churn models.")
+    parser.add_argument("input", help="CSV or Parquet file shaped like data/Telco-Customer-Churn.csv")
+    parser.add_argument("output", help="Scores file to write (.csv or .parquet)")
+    parser.add_argument("--models", nargs="+", default=None, help="Model names to run (default: all)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--engine", choices=ENGINES, default=BATCH_ENGINE, help="Inference engine for tree models")
+    parser.add_argument("--monitor", action="store_true",
+                        help="Compare inputs and scores with the training data and print a drift report")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes; 0 uses every core (default: 1, single process)")
+    parser.add_argument("--no-calibration", action="store_true",
+                        help="Only write raw model probabilities (no calibrated columns)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+
+    monitor = None
+    if args.monitor:
+        from src.monitoring import DriftMonitor, load_profile
+
+        monitor = DriftMonitor(load_profile())
+
+    stats = score_file(args.input, args.output, args.models, args.chunksize, engine=args.engine,
+                       workers=args.workers, monitor=monitor, calibrate=not args.no_calibration)
+
+    workers = f" on {stats['workers']} workers" if "workers" in stats else ""
+    print(f"Scored {stats['rows']:,} rows with {', '.join(stats['models'])}{workers} "
+          f"in {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec)")
+    for stage, seconds in stats["stage_seconds"].items():
+        print(f"  {stage:<6} {seconds:.2f}s")
+
+    if monitor is not None:
+        report = monitor.report()
+        flagged = report[report["status"] != "ok"]
+        print(f"\nDrift check: {len(flagged)} of {len(report)} features flagged")
+        if len(flagged):
+            print(flagged.round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
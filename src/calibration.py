@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from src.evaluation import DATA_PATH, holdout_cache_key, holdout_scores
+from src.model_training import BASE_PATH, ModelRegistry
+from src.preprocessing import get_feature_pipeline
+
+# The models are fitted on SMOTE-balanced data, so their probabilities
+# assume a 50% churn rate. A calibrator maps them back to the real base
+# rate. It is fitted on the held-out split, which neither SMOTE nor the
+# model ever saw.
+CALIBRATION_FILE = os.path.join(BASE_PATH, "calibration.json")
+METHODS = ("isotonic", "platt")
+CV_FOLDS = 5
+# Platt scaling is tabulated on a logit grid so both methods serve through
+# the same np.interp lookup; the linear interpolation error is < 1e-4.
+PLATT_LOGIT_RANGE = 12.0
+PLATT_KNOTS = 481
+PROB_EPS = 1e-6
+# The app's warm-up threads and its first request can all ask for the
+# calibration at once; it is fitted and saved only once.
+_build_lock = threading.Lock()
+_get_lock = threading.Lock()
+
+
+def brier(prob, y):
+    return float(np.mean((np.asarray(prob, dtype=np.float64) - y) ** 2))
+
+
+def fit_isotonic(prob, y):
+    from sklearn.isotonic import IsotonicRegression
+
+    iso = IsotonicRegression(y_min=0.0, y_max=1.0, out_of_bounds="clip").fit(prob, y)
+    return iso.X_thresholds_, iso.y_thresholds_
+
+
+def fit_platt(prob, y):
+    # Logistic regression on the logit of the raw probability.
+    from sklearn.linear_model import LogisticRegression
+
+    def logit(p):
+        p = np.clip(p, PROB_EPS, 1 - PROB_EPS)
+        return np.log(p / (1 - p))
+
+    lr = LogisticRegression(C=1e6).fit(logit(prob).reshape(-1, 1), y)
+    z = np.linspace(-PLATT_LOGIT_RANGE, PLATT_LOGIT_RANGE, PLATT_KNOTS)
+    x = np.r_[0.0, 1 / (1 + np.exp(-z)), 1.0]
+    return x, lr.predict_proba(logit(x).reshape(-1, 1))[:, 1]
+
+
+FITTERS = {"isotonic": fit_isotonic, "platt": fit_platt}
+
+
+def cross_validated_brier(prob, y, method, folds=CV_FOLDS, seed=42):
+    # Out-of-fold Brier score of one method, the fair way to compare a
+    # flexible isotonic fit with the two-parameter Platt fit.
+    from sklearn.model_selection import StratifiedKFold
+
+    calibrated = np.empty_like(prob)
+    for fit_index, test_index in StratifiedKFold(folds, shuffle=True, random_state=seed).split(prob, y):
+        x, table = FITTERS[method](prob[fit_index], y[fit_index])
+        calibrated[test_index] = np.interp(prob[test_index], x, table)
+    return brier(calibrated, y)
+
+
+class Calibrator:
+    # Monotone piecewise-linear map from raw to calibrated probability,
+    # stored as its knots.
+
+    def __init__(self, method, x, y):
+        self.method = method
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+
+    def __call__(self, prob):
+        return np.interp(prob, self.x, self.y)
+
+    def to_dict(self):
+        return {"method": self.method, "x": self.x.tolist(), "y": self.y.tolist()}
+
+
+def fit_calibrator(prob, y, method=None):
+    # method=None picks whichever method has the lower cross-validated
+    # Brier score. Returns the calibrator and a summary for the report.
+    prob = np.asarray(prob, dtype=np.float64)
+    y = np.asarray(y, dtype=np.int64)
+
+    cv_brier = {"raw": brier(prob, y)}
+    for name in METHODS:
+        cv_brier[name] = cross_validated_brier(prob, y, name)
+    method = min(METHODS, key=cv_brier.get) if method is None else method
+
+    calibrator = Calibrator(method, *FITTERS[method](prob, y))
+    summary = {
+        "method": method,
+        "rows": len(y),
+        "base_rate": float(y.mean()),
+        "mean_raw": float(prob.mean()),
+        "mean_calibrated": float(calibrator(prob).mean()),
+        "cv_brier": cv_brier,
+    }
+    return calibrator, summary
+
+
+class Calibration:
+    # Calibrators of every model plus the held-out cache keys they were
+    # fitted for. Models without a calibrator pass through unchanged.
+
+    def __init__(self, calibrators=None, keys=None, summary=None):
+        self.calibrators = dict(calibrators or {})
+        self.keys = dict(keys or {})
+        self.summary = dict(summary or {})
+
+    def calibrate(self, model_name, prob):
+        calibrator = self.calibrators.get(model_name)
+        return prob if calibrator is None else calibrator(prob)
+
+    def to_dict(self):
+        return {
+            "models": {
+                name: {**calibrator.to_dict(), "key": self.keys.get(name), "summary": self.summary.get(name)}
+                for name, calibrator in self.calibrators.items()
+            }
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        models = data.get("models", {})
+        return cls(
+            {name: Calibrator(entry["method"], entry["x"], entry["y"]) for name, entry in models.items()},
+            {name: entry.get("key") for name, entry in models.items()},
+            {name: entry.get("summary") for name, entry in models.items()},
+        )
+
+    def save(self, path=CALIBRATION_FILE):
+        # Written aside and renamed, so a reader never sees a partial file.
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+
+def build_calibration(registry=None, pipeline=None, data_path=DATA_PATH, method=None):
+    registry = ModelRegistry() if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+
+    calibrators, keys, summary = {}, {}, {}
+    for name, (y, prob, _) in holdout_scores(registry, pipeline, data_path).items():
+        calibrators[name], summary[name] = fit_calibrator(prob, y, method)
+        keys[name] = holdout_cache_key(registry.paths[name], pipeline, data_path)
+
+    return Calibration(calibrators, keys, summary)
+
+
+def load_calibration(path=CALIBRATION_FILE, data_path=DATA_PATH, registry=None, pipeline=None):
+    # Refitted (and re-saved) when the data, a model or the pipeline changed.
+    registry = ModelRegistry() if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+    keys = {name: holdout_cache_key(registry.paths[name], pipeline, data_path) for name in registry.available()}
+
+    with _build_lock:
+        if os.path.exists(path):
+            with open(path) as f:
+                calibration = Calibration.from_dict(json.load(f))
+            if calibration.keys == keys:
+                return calibration
+
+        calibration = build_calibration(registry, pipeline, data_path)
+        calibration.save(path)
+        return calibration
+
+
+@lru_cache(maxsize=1)
+def _cached_calibration(registry):
+    return load_calibration(registry=registry)
+
+
+def get_calibration(registry=None):
+    # Pass the app's registry so the models are not loaded a second time.
+    with _get_lock:
+        return _cached_calibration(registry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit probability calibration on the held-out split.")
+    parser.add_argument("--method", choices=METHODS, default=None,
+                        help="Calibration method (default: lower cross-validated Brier score per model)")
+    parser.add_argument("--output", default=CALIBRATION_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    calibration = build_calibration(method=args.method)
+    calibration.save(args.output)
+    print(f"Fitted calibration in {time.perf_counter() - start:.2f}s -> {args.output}")
+
+    for name, summary in calibration.summary.items():
+        cv_brier = summary["cv_brier"]
+        print(f"{name:<20} {summary['method']:<9} base rate {summary['base_rate']:.3f}  "
+              f"mean raw {summary['mean_raw']:.3f} -> calibrated {summary['mean_calibrated']:.3f}  "
+              f"CV Brier raw {cv_brier['raw']:.4f} isotonic {cv_brier['isotonic']:.4f} "
+              f"platt {cv_brier['platt']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
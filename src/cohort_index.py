@@ -0,0 +1,162 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.artifacts import file_sha256
+from src.model_training import BASE_PATH, ModelRegistry, needs_scaling
+from src.preprocessing import get_feature_pipeline
+
+DATA_PATH = "data/Telco-Customer-Churn.csv"
+COHORT_INDEX_FILE = os.path.join(BASE_PATH, "cohort_index.joblib")
+ID_COLUMN = "customerID"
+TARGET_COLUMN = "Churn"
+# Raw fields kept for showing the neighbours; the rest is only needed to encode.
+DISPLAY_COLUMNS = ["tenure", "Contract", "InternetService", "MonthlyCharges"]
+DEFAULT_NEIGHBOURS = 10
+# Serializes build-and-save: the app's warm-up threads and its first
+# request can all ask for the index at once.
+_build_lock = threading.Lock()
+_get_lock = threading.Lock()
+
+
+def index_fingerprint(data_path, registry, pipeline):
+    # Changes whenever the customer file, any model or the feature pipeline
+    # changes, which is when the stored index stops matching what is served.
+    digest = hashlib.sha256()
+    digest.update(file_sha256(data_path).encode())
+    for name in registry.available():
+        digest.update(name.encode())
+        digest.update(file_sha256(registry.paths[name]).encode())
+    digest.update(json.dumps(pipeline.to_dict(), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class CohortIndex:
+    # The existing customer base, encoded and scored once: a KD-tree over the
+    # standardized features for nearest-neighbour lookups and sorted model
+    # scores for percentile ranks.
+
+    def __init__(self, customers, X, churned, scores, fingerprint=None):
+        from scipy.spatial import cKDTree
+
+        self.customers = customers
+        self.X = X
+        self.churned = churned
+        self.scores = scores
+        self.sorted_scores = {name: np.sort(values) for name, values in scores.items()}
+        self.fingerprint = fingerprint
+        self.tree = cKDTree(X)
+
+    @classmethod
+    def build(cls, data_path=DATA_PATH, registry=None, pipeline=None):
+        registry = ModelRegistry() if registry is None else registry
+        pipeline = get_feature_pipeline() if pipeline is None else pipeline
+
+        df = pd.read_csv(data_path)
+        X = pipeline.encode_frame(df, scale=False)
+        X_scaled = pipeline.scale(X)
+
+        scores = {}
+        for name in registry.available():
+            model = registry.get(name)
+            scores[name] = model.predict_proba(X_scaled if needs_scaling(name) else X)[:, 1]
+
+        customers = df[[ID_COLUMN] + DISPLAY_COLUMNS].reset_index(drop=True)
+        churned = (df[TARGET_COLUMN] == "Yes").to_numpy()
+
+        return cls(customers, X_scaled, churned, scores, index_fingerprint(data_path, registry, pipeline))
+
+    def __len__(self):
+        return len(self.X)
+
+    def similar(self, x_scaled, k=DEFAULT_NEIGHBOURS):
+        # x_scaled is one customer encoded with scale=True.
+        distances, indices = self.tree.query(np.asarray(x_scaled).reshape(-1), k=k)
+        return np.atleast_1d(indices), np.atleast_1d(distances)
+
+    def similar_customers(self, x_scaled, k=DEFAULT_NEIGHBOURS, model_name=None):
+        indices, distances = self.similar(x_scaled, k)
+        similar = self.customers.iloc[indices].copy()
+        similar["Distance"] = distances
+        if model_name in self.scores:
+            similar["Churn Probability"] = self.scores[model_name][indices]
+        similar["Churned"] = np.where(self.churned[indices], "Yes", "No")
+
+        return similar.reset_index(drop=True), int(self.churned[indices].sum())
+
+    def percentile(self, model_name, probability):
+        # Share of existing customers (0-100) this model rates as less likely to churn.
+        scores = self.sorted_scores[model_name]
+        return 100.0 * np.searchsorted(scores, probability, side="left") / len(scores)
+
+    def save(self, path=COHORT_INDEX_FILE):
+        # Written aside and renamed, so a reader never sees a partial file.
+        tmp_path = f"{path}.tmp"
+        joblib.dump({
+            "fingerprint": self.fingerprint,
+            "customers": self.customers,
+            "X": self.X,
+            "churned": self.churned,
+            "scores": self.scores,
+        }, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=COHORT_INDEX_FILE):
+        state = joblib.load(path)
+        return cls(state["customers"], state["X"], state["churned"], state["scores"], state["fingerprint"])
+
+
+def load_cohort_index(path=COHORT_INDEX_FILE, data_path=DATA_PATH, registry=None, pipeline=None):
+    # Loads the stored index, rebuilding (and re-saving) it only when the
+    # data, a model or the pipeline changed since it was written.
+    registry = ModelRegistry() if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+    fingerprint = index_fingerprint(data_path, registry, pipeline)
+
+    with _build_lock:
+        if os.path.exists(path):
+            index = CohortIndex.load(path)
+            if index.fingerprint == fingerprint:
+                return index
+
+        index = CohortIndex.build(data_path, registry, pipeline)
+        index.save(path)
+        return index
+
+
+@lru_cache(maxsize=1)
+def _cached_cohort_index(registry):
+    return load_cohort_index(registry=registry)
+
+
+def get_cohort_index(registry=None):
+    # Pass the app's registry so the models are not loaded a second time.
+    # lru_cache alone lets concurrent first calls each build the index.
+    with _get_lock:
+        return _cached_cohort_index(registry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the cohort index of existing customers.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output", default=COHORT_INDEX_FILE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = CohortIndex.build(args.data)
+    index.save(args.output)
+    print(f"Indexed {len(index):,} customers for {', '.join(index.scores)} "
+          f"in {time.perf_counter() - start:.2f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
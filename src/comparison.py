@@ -0,0 +1,55 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.decision import DecisionPolicy
+from src.model_training import needs_scaling
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    # One shared pool for the process; sklearn releases the GIL in most of
+    # predict_proba so the models genuinely overlap. Locked so concurrent
+    # sessions cannot each create (and leak) a pool.
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="compare")
+        return _executor
+
+
+def _score_model(name, model, row, threshold, calibration=None):
+    start = time.perf_counter()
+    prob = model.predict_proba(row)[0]
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "model": name,
+        "stay_probability": float(prob[0]),
+        "churn_probability": float(prob[1]),
+        "prediction": int(prob[1] > threshold),
+        "inference_ms": elapsed * 1000.0,
+    }
+    if calibration is not None:
+        result["calibrated_churn_probability"] = float(calibration.calibrate(name, prob[1]))
+    return result
+
+
+def compare_models(models, row, pipeline, policy=None, calibration=None):
+    # row is the unscaled encoded customer; the scaled copy is derived once
+    # for the models that were trained on standardized features.
+    policy = DecisionPolicy.load() if policy is None else policy
+    executor = get_executor()
+    start = time.perf_counter()
+    scaled_row = pipeline.scale(row)
+
+    futures = [
+        executor.submit(_score_model, name, model, scaled_row if needs_scaling(name) else row,
+                        policy.threshold(name), calibration)
+        for name, model in models.items()
+    ]
+    results = [future.result() for future in futures]
+
+    return results, (time.perf_counter() - start) * 1000.0
@@ -0,0 +1,146 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.model_training import BASE_PATH
+
+POLICY_FILE = os.path.join(BASE_PATH, "decision_policy.json")
+DEFAULT_THRESHOLD = 0.5
+
+# Retention economics: what one offer costs, the share of would-be churners
+# it keeps, and how many months of MonthlyCharges a churner takes with them.
+DEFAULT_OFFER_COST = 20.0
+DEFAULT_SAVE_RATE = 0.3
+DEFAULT_LOSS_MONTHS = 12
+CURVE_POINTS = 400
+
+
+def churn_decision(prob, threshold=DEFAULT_THRESHOLD):
+    # 1 = treat as churning. Strictly greater, so 0.5 reproduces predict().
+    return (np.asarray(prob) > threshold).astype(np.int64)
+
+
+class DecisionPolicy:
+    # Per-model churn thresholds plus the cost inputs they were chosen for.
+
+    def __init__(self, thresholds=None, offer_cost=DEFAULT_OFFER_COST, save_rate=DEFAULT_SAVE_RATE,
+                 loss_months=DEFAULT_LOSS_MONTHS):
+        self.thresholds = dict(thresholds or {})
+        self.offer_cost = float(offer_cost)
+        self.save_rate = float(save_rate)
+        self.loss_months = float(loss_months)
+
+    def threshold(self, model_name):
+        return self.thresholds.get(model_name, DEFAULT_THRESHOLD)
+
+    def decide(self, model_name, prob):
+        return churn_decision(prob, self.threshold(model_name))
+
+    def to_dict(self):
+        return {
+            "thresholds": self.thresholds,
+            "offer_cost": self.offer_cost,
+            "save_rate": self.save_rate,
+            "loss_months": self.loss_months,
+        }
+
+    def save(self, path=POLICY_FILE):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path=POLICY_FILE):
+        # No policy file means every model keeps the 0.5 threshold.
+        if not os.path.exists(path):
+            return cls()
+        with open(path) as f:
+            return cls(**json.load(f))
+
+
+class RetentionValueSweep:
+    # Value of contacting everyone above each possible threshold, for any
+    # cost inputs. Scores are sorted once; each call to values() is then a
+    # handful of O(n) array operations, so cost inputs can change freely.
+    #
+    # With outcomes y (validation data) the value uses who actually churned;
+    # without them it uses the probabilities as expected churn.
+
+    def __init__(self, prob, monthly_charges, y=None):
+        prob = np.asarray(prob, dtype=np.float64)
+        order = np.argsort(-prob, kind="stable")
+        desc_prob = prob[order]
+        churn = desc_prob if y is None else np.asarray(y, dtype=np.float64)[order]
+
+        # Cut after the last customer of every distinct score.
+        cuts = np.r_[np.flatnonzero(np.diff(desc_prob)), len(desc_prob) - 1] if len(prob) else np.empty(0, np.intp)
+        self.n = len(prob)
+        self.top_score = desc_prob[0] if len(prob) else -np.inf
+        self.targeted = cuts + 1
+        # Contacting the top `targeted` customers means predicting churn for
+        # prob > the next lower score. The last cut targets everyone, so its
+        # threshold sits just below the lowest score when that score is 0.
+        last = min(0.0, np.nextafter(desc_prob[-1], -np.inf)) if len(cuts) else 0.0
+        self.thresholds = np.r_[desc_prob[cuts[:-1] + 1], last] if len(cuts) else np.empty(0)
+        self.churners = np.cumsum(churn)[cuts]
+        self.revenue_at_risk = np.cumsum(churn * np.asarray(monthly_charges, dtype=np.float64)[order])[cuts]
+        self.total_churners = float(churn.sum())
+
+    def values(self, offer_cost=DEFAULT_OFFER_COST, save_rate=DEFAULT_SAVE_RATE, loss_months=DEFAULT_LOSS_MONTHS):
+        return save_rate * loss_months * self.revenue_at_risk - offer_cost * self.targeted
+
+    def optimize(self, offer_cost=DEFAULT_OFFER_COST, save_rate=DEFAULT_SAVE_RATE, loss_months=DEFAULT_LOSS_MONTHS):
+        values = self.values(offer_cost, save_rate, loss_months)
+        best = int(np.argmax(values)) if len(values) else -1
+
+        # Contacting nobody is worth 0 and is the answer when no cut pays off.
+        if best < 0 or values[best] <= 0:
+            return {"threshold": 1.0, "value": 0.0, "targeted": 0, "share_targeted": 0.0,
+                    "precision": 0.0, "recall": 0.0}
+
+        return {
+            "threshold": float(self.thresholds[best]),
+            "value": float(values[best]),
+            "targeted": int(self.targeted[best]),
+            "share_targeted": float(self.targeted[best] / self.n),
+            "precision": float(self.churners[best] / self.targeted[best]),
+            "recall": float(self.churners[best] / self.total_churners) if self.total_churners else 0.0,
+        }
+
+    def value_at(self, threshold, offer_cost=DEFAULT_OFFER_COST, save_rate=DEFAULT_SAVE_RATE,
+                 loss_months=DEFAULT_LOSS_MONTHS):
+        # thresholds descend as more customers are targeted; the first cut
+        # whose threshold is <= t is exactly the set with prob > t. At or
+        # above the top score nobody is contacted; below the last cut,
+        # everyone is.
+        if threshold >= self.top_score:
+            return 0.0
+        position = np.searchsorted(-self.thresholds, -threshold, side="left")
+        position = min(position, len(self.thresholds) - 1)
+        return float(self.values(offer_cost, save_rate, loss_months)[position])
+
+    def curve(self, offer_cost=DEFAULT_OFFER_COST, save_rate=DEFAULT_SAVE_RATE, loss_months=DEFAULT_LOSS_MONTHS,
+              points=CURVE_POINTS):
+        # Value against threshold, thinned to at most `points` rows for plotting.
+        keep = np.unique(np.linspace(0, len(self.thresholds) - 1, min(points, len(self.thresholds))).astype(np.intp))
+        return pd.DataFrame({
+            "threshold": self.thresholds[keep],
+            "targeted": self.targeted[keep],
+            "value": self.values(offer_cost, save_rate, loss_months)[keep],
+        })
+
+
+def retention_sweeps(reports):
+    # One sweep per model from its cached held-out scores (EvaluationReport).
+    return {
+        name: RetentionValueSweep(report.prob, report.monthly_charges, report.y)
+        for name, report in reports.items()
+    }
+
+
+def optimal_policy(sweeps, offer_cost=DEFAULT_OFFER_COST, save_rate=DEFAULT_SAVE_RATE,
+                   loss_months=DEFAULT_LOSS_MONTHS):
+    optima = {name: sweep.optimize(offer_cost, save_rate, loss_months) for name, sweep in sweeps.items()}
+    thresholds = {name: best["threshold"] for name, best in optima.items()}
+    return DecisionPolicy(thresholds, offer_cost, save_rate, loss_months), optima
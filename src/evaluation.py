@@ -1,38 +1,242 @@
-import pickle
+import glob
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-from sklearn.metrics import (
-    confusion_matrix,
-    roc_curve,
-    auc
-)
+from src.artifacts import file_sha256
+from src.model_training import BASE_PATH, ModelRegistry, needs_scaling
+from src.preprocessing import get_feature_pipeline
+
+DATA_PATH = "data/Telco-Customer-Churn.csv"
+CACHE_DIR = os.path.join(BASE_PATH, "evaluation_cache")
+REPORT_THRESHOLDS = np.round(np.arange(0.1, 1.0, 0.1), 2)
+N_BINS = 10
+# Bumped whenever the cached arrays change shape, so old caches are ignored.
+CACHE_VERSION = 2
+_cache_lock = threading.Lock()
 
-from src.model_training import load_all_models
-from src.preprocessing import load_scaler, load_columns
 
+@lru_cache(maxsize=1)
+def read_dataset(path=DATA_PATH):
+    # Parsed once per process; drop() below returns a new frame, so callers
+    # never modify the cached one.
+    return pd.read_csv(path)
 
-def load_data():
 
-    df = pd.read_csv("data/Telco-Customer-Churn.csv")
+def load_data(path=DATA_PATH):
 
-    df = df.drop("Churn", axis=1)
+    df = read_dataset(path).drop("Churn", axis=1)
 
     return df
 
 
-def plot_roc_curve(model, X_test, y_test):
+def holdout_split(pipeline, data_path=DATA_PATH):
+    # The same held-out rows the training pipeline reports its test metrics on.
+    from src.training_pipeline import TARGET_COLUMN, split_features
+
+    df = read_dataset(data_path).copy()
+    df[TARGET_COLUMN] = df[TARGET_COLUMN].map({"No": 0, "Yes": 1})
+    _, X_test, _, y_test = split_features(df, pipeline)
+
+    return X_test, y_test
+
+
+def holdout_cache_key(model_path, pipeline, data_path=DATA_PATH):
+    from src.training_pipeline import RANDOM_STATE, TEST_SIZE
+
+    digest = hashlib.sha256()
+    for part in (file_sha256(data_path), file_sha256(model_path),
+                 json.dumps(pipeline.to_dict(), sort_keys=True), f"{TEST_SIZE}-{RANDOM_STATE}-v{CACHE_VERSION}"):
+        digest.update(part.encode())
+    return digest.hexdigest()[:16]
+
+
+def holdout_scores(registry=None, pipeline=None, data_path=DATA_PATH, cache_dir=CACHE_DIR):
+    # {model name: (y_test, churn probabilities, MonthlyCharges)}. Each model
+    # is run on the held-out set only when no cached vector matches its
+    # current artifact.
+    registry = ModelRegistry() if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+    os.makedirs(cache_dir, exist_ok=True)
+
+    scores = {}
+    X_test = None
+    for name in registry.available():
+        key = holdout_cache_key(registry.paths[name], pipeline, data_path)
+        prefix = os.path.join(cache_dir, name.lower().replace(' ', '_'))
+        path = f"{prefix}-{key}.npz"
+
+        if os.path.exists(path):
+            with np.load(path) as cached:
+                scores[name] = (cached["y"], cached["prob"], cached["monthly_charges"])
+            continue
+
+        if X_test is None:
+            X_test, y_test = holdout_split(pipeline, data_path)
+        X_model = pipeline.scale(X_test) if needs_scaling(name) else X_test
+        prob = registry.get(name).predict_proba(X_model)[:, 1]
+        monthly_charges = X_test[:, pipeline.numeric_index["MonthlyCharges"]]
+        _save_holdout(prefix, key, y=y_test, prob=prob, monthly_charges=monthly_charges)
+        scores[name] = (y_test, prob, monthly_charges)
+
+    return scores
+
+
+def _save_holdout(prefix, key, **arrays):
+    # Written aside (per process, so concurrent writers never share a
+    # file) and renamed, so readers never load a partial .npz. The model's
+    # entries for older artifacts are removed, since nothing reads them.
+    path = f"{prefix}-{key}.npz"
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with _cache_lock:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        for old in glob.glob(f"{glob.escape(prefix)}-{'[0-9a-f]' * len(key)}.npz"):
+            if old != path:
+                try:
+                    os.remove(old)
+                except FileNotFoundError:
+                    pass
+
+
+class EvaluationReport:
+    # Every metric of one model derived from its held-out probabilities with
+    # a single sort; thresholds predict churn when probability > threshold,
+    # which matches predict() at 0.5.
+
+    def __init__(self, y, prob, monthly_charges=None):
+        self.y = np.asarray(y, dtype=np.int64)
+        self.prob = np.asarray(prob, dtype=np.float64)
+        self.monthly_charges = monthly_charges
+        self.n_positive = int(self.y.sum())
+        self.n_negative = len(self.y) - self.n_positive
+
+        order = np.argsort(-self.prob, kind="mergesort")
+        self._desc_prob = self.prob[order]
+        self._desc_y = self.y[order]
+        self._positive_prob = np.sort(self.prob[self.y == 1])
+        self._negative_prob = np.sort(self.prob[self.y == 0])
 
-    prob = model.predict_proba(X_test)[:, 1]
+    def confusion(self, thresholds=REPORT_THRESHOLDS):
+        thresholds = np.atleast_1d(np.asarray(thresholds, dtype=np.float64))
+        tp = self.n_positive - np.searchsorted(self._positive_prob, thresholds, side="right")
+        fp = self.n_negative - np.searchsorted(self._negative_prob, thresholds, side="right")
+        fn = self.n_positive - tp
+        tn = self.n_negative - fp
 
-    fpr, tpr, _ = roc_curve(y_test, prob)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+            recall = tp / max(self.n_positive, 1)
+            f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
 
-    roc_auc = auc(fpr, tpr)
+        return pd.DataFrame({
+            "threshold": thresholds,
+            "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+            "accuracy": (tp + tn) / len(self.y),
+            "precision": precision,
+            "recall": recall,
+            "f1": f1,
+        })
+
+    def _curve_counts(self):
+        # Cumulative true/false positives at each distinct score, highest first.
+        distinct = np.flatnonzero(np.diff(self._desc_prob)) if len(self._desc_prob) > 1 else np.empty(0, dtype=np.intp)
+        last = np.r_[distinct, len(self._desc_prob) - 1]
+        tps = np.cumsum(self._desc_y)[last]
+        fps = last + 1 - tps
+        return tps, fps, self._desc_prob[last]
+
+    def roc(self):
+        tps, fps, thresholds = self._curve_counts()
+        fpr = np.r_[0.0, fps / max(self.n_negative, 1)]
+        tpr = np.r_[0.0, tps / max(self.n_positive, 1)]
+        return fpr, tpr, np.r_[np.inf, thresholds]
+
+    def roc_auc(self):
+        fpr, tpr, _ = self.roc()
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def precision_recall(self):
+        tps, fps, thresholds = self._curve_counts()
+        precision = np.r_[1.0, tps / (tps + fps)]
+        recall = np.r_[0.0, tps / max(self.n_positive, 1)]
+        return precision, recall, np.r_[np.inf, thresholds]
+
+    def average_precision(self):
+        precision, recall, _ = self.precision_recall()
+        return float(np.sum(np.diff(recall) * precision[1:]))
+
+    def brier(self):
+        return float(np.mean((self.prob - self.y) ** 2))
+
+    def calibration(self, n_bins=N_BINS):
+        bins = np.minimum((self.prob * n_bins).astype(np.intp), n_bins - 1)
+        count = np.bincount(bins, minlength=n_bins)
+        predicted = np.bincount(bins, weights=self.prob, minlength=n_bins)
+        observed = np.bincount(bins, weights=self.y, minlength=n_bins)
+        filled = count > 0
+
+        return pd.DataFrame({
+            "bin": np.arange(n_bins)[filled] / n_bins,
+            "customers": count[filled],
+            "mean_predicted": predicted[filled] / count[filled],
+            "observed_rate": observed[filled] / count[filled],
+        })
+
+    def gains(self, n_bins=N_BINS):
+        # Customers ranked by churn probability and cut into equal groups.
+        edges = np.linspace(0, len(self.y), n_bins + 1).round().astype(np.intp)
+        churners_to = np.r_[0, np.cumsum(self._desc_y)]
+        churners = churners_to[edges[1:]] - churners_to[edges[:-1]]
+        customers = np.diff(edges)
+        base_rate = self.n_positive / max(len(self.y), 1)
+
+        cumulative_customers = np.cumsum(customers)
+        cumulative_churners = np.cumsum(churners)
+        return pd.DataFrame({
+            "group": np.arange(1, n_bins + 1),
+            "customers": customers,
+            "churners": churners,
+            "churn_rate": churners / np.maximum(customers, 1),
+            "lift": churners / np.maximum(customers, 1) / base_rate,
+            "cumulative_gain": cumulative_churners / max(self.n_positive, 1),
+            "cumulative_lift": cumulative_churners / cumulative_customers / base_rate,
+        })
+
+    def summary(self, threshold=0.5):
+        at = self.confusion([threshold]).iloc[0]
+        return {
+            "roc_auc": self.roc_auc(),
+            "average_precision": self.average_precision(),
+            "brier": self.brier(),
+            "accuracy": float(at["accuracy"]),
+            "precision": float(at["precision"]),
+            "recall": float(at["recall"]),
+            "f1": float(at["f1"]),
+        }
+
+
+def evaluation_reports(registry=None, pipeline=None, data_path=DATA_PATH, cache_dir=CACHE_DIR):
+    return {
+        name: EvaluationReport(y, prob, monthly_charges)
+        for name, (y, prob, monthly_charges) in holdout_scores(registry, pipeline, data_path, cache_dir).items()
+    }
+
+
+def plot_roc_curve(report):
+    import matplotlib.pyplot as plt
+
+    fpr, tpr, _ = report.roc()
 
     fig, ax = plt.subplots()
 
-    ax.plot(fpr, tpr, label=f"AUC = {roc_auc:.2f}")
+    ax.plot(fpr, tpr, label=f"AUC = {report.roc_auc():.2f}")
 
     ax.plot([0, 1], [0, 1], linestyle="--")
 
@@ -45,11 +249,12 @@ def plot_roc_curve(model, X_test, y_test):
     return fig
 
 
-def plot_confusion_matrix(model, X_test, y_test):
-
-    y_pred = model.predict(X_test)
+def plot_confusion_matrix(report, threshold=0.5):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    cm = confusion_matrix(y_test, y_pred)
+    at = report.confusion([threshold]).iloc[0]
+    cm = np.array([[at["tn"], at["fp"]], [at["fn"], at["tp"]]], dtype=np.int64)
 
     fig, ax = plt.subplots()
 
@@ -60,5 +265,3 @@ def plot_confusion_matrix(model, X_test, y_test):
     ax.set_title("Confusion Matrix")
 
     return fig
-
-
@@ -0,0 +1,94 @@
+import numpy as np
+
+from src.tree_engine import CHUNK_ROWS, PackedTrees
+
+
+class ContributionExplainer:
+    # Exact additive explanations: bias + contributions.sum(axis=1) equals
+    # the model output (log-odds for linear models, churn probability for
+    # trees and forests).
+
+    def __init__(self, model, feature_names, class_index=1):
+        self.feature_names = list(feature_names)
+        self.n_features = len(self.feature_names)
+
+        if hasattr(model, "coef_"):
+            self.kind = "linear"
+            self.units = "log-odds"
+            self.coef = np.asarray(model.coef_[0], dtype=np.float64)
+            self.intercept = float(model.intercept_[0])
+        elif hasattr(model, "estimators_") or hasattr(model, "tree_"):
+            self.kind = "tree"
+            self.units = "probability"
+            estimators = model.estimators_ if hasattr(model, "estimators_") else [model]
+            self.trees = PackedTrees.from_estimators(estimators, class_index)
+            self.intercept = float(self.trees.value[self.trees.roots].mean())
+        elif isinstance(getattr(model, "trees", None), PackedTrees):
+            # TreeEnsemblePredictor, from src.tree_engine or src.artifacts.
+            self.kind = "tree"
+            self.units = "probability"
+            self.trees = model.trees
+            self.intercept = float(self.trees.value[self.trees.roots].mean())
+        else:
+            raise TypeError(f"Cannot explain model of type {type(model).__name__}")
+
+    def explain(self, X):
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+
+        if self.kind == "linear":
+            return X * self.coef, np.full(len(X), self.intercept)
+
+        contributions = np.empty((len(X), self.n_features))
+        for start in range(0, len(X), CHUNK_ROWS):
+            chunk = X[start:start + CHUNK_ROWS]
+            contributions[start:start + len(chunk)] = self._tree_contributions(chunk)
+
+        return contributions, np.full(len(X), self.intercept)
+
+    def _tree_contributions(self, X):
+        trees = self.trees
+        n_rows = len(X)
+        # sklearn evaluates splits on float32 inputs; match it exactly.
+        X32 = X.astype(np.float32)
+
+        node = np.broadcast_to(trees.roots, (n_rows, trees.n_trees)).copy()
+        row_index = np.arange(n_rows)[:, None]
+        flat_offset = row_index * self.n_features
+        totals = np.zeros(n_rows * self.n_features)
+
+        for _ in range(trees.max_depth):
+            feature = trees.feature[node]
+            go_left = X32[row_index, feature] <= trees.threshold[node]
+            child = np.where(go_left, trees.left[node], trees.right[node])
+
+            delta = trees.value[child] - trees.value[node]
+            totals += np.bincount((flat_offset + feature).ravel(), weights=delta.ravel(),
+                                  minlength=totals.size)
+            node = child
+
+        return totals.reshape(n_rows, self.n_features) / trees.n_trees
+
+    def top_features(self, contributions, k=10):
+        # Indices of the k largest |contribution| per row, most influential first.
+        contributions = np.atleast_2d(contributions)
+        k = min(k, contributions.shape[1])
+        magnitude = np.abs(contributions)
+        top = np.argpartition(-magnitude, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(magnitude, top, axis=1), axis=1)
+
+        return np.take_along_axis(top, order, axis=1)
+
+    def risk_drivers(self, contributions, k=3):
+        # Names of the (up to) k features raising each row's churn risk the most.
+        contributions = np.atleast_2d(contributions)
+        k = min(k, contributions.shape[1])
+        top = np.argpartition(-contributions, k - 1, axis=1)[:, :k]
+        values = np.take_along_axis(contributions, top, axis=1)
+        order = np.argsort(-values, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
+        raises_risk = np.take_along_axis(values, order, axis=1) > 0
+
+        names = np.asarray(self.feature_names, dtype=object)
+        return [", ".join(names[row[mask]]) for row, mask in zip(top, raises_risk)]
@@ -0,0 +1,259 @@
+import numpy as np
+import plotly.graph_objects as go
+
+
+def churn_gauge(churn_probability, decision_threshold=0.5):
+    # Bands split at the model's decision threshold, so the colour under the
+    # needle always agrees with the prediction shown above it.
+    cut = decision_threshold * 100
+    fig_gauge = go.Figure(go.Indicator(
+        mode = "gauge+number+delta",
+        value = churn_probability * 100,
+        domain = {'x': [0, 1], 'y': [0, 1]},
+        title = {'text': "Churn Risk Level", 'font': {'size': 24, 'color': 'white'}},
+        delta = {'reference': cut, 'increasing': {'color': "#ef4444"}, 'decreasing': {'color': "#10b981"}},
+        gauge = {
+            'axis': {'range': [None, 100], 'tickwidth': 2, 'tickcolor': "white"},
+            'bar': {'color': "#7e22ce"},
+            'bgcolor': "white",
+            'borderwidth': 2,
+            'bordercolor': "white",
+            'steps': [
+                {'range': [0, cut], 'color': '#10b981'},
+                {'range': [cut, 100], 'color': '#ef4444'}],
+            'threshold': {
+                'line': {'color': "white", 'width': 4},
+                'thickness': 0.75,
+                'value': cut}}))
+
+    fig_gauge.update_layout(
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        font={'color': "white", 'family': "Arial"},
+        height=400
+    )
+
+    return fig_gauge
+
+
+def contribution_bar(features, contributions, units):
+    # Most influential first at the top; one trace per direction so the
+    # legend reads "Raises"/"Lowers churn risk".
+    features = np.asarray(features)[::-1]
+    contributions = np.asarray(contributions, dtype=np.float64)[::-1]
+    raises = contributions > 0
+
+    fig_features = go.Figure([
+        go.Bar(y=features[mask], x=contributions[mask], orientation='h', name=name, marker_color=color)
+        for name, mask, color in (
+            ('Raises churn risk', raises, '#ef4444'),
+            ('Lowers churn risk', ~raises, '#10b981'),
+        )
+        if mask.any()
+    ])
+
+    fig_features.update_layout(
+        title='Top 10 Drivers of This Customer\'s Prediction',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,0.9)',
+        font={'color': "white", 'family': "Arial", 'size': 12},
+        title_font={'size': 20, 'color': 'white'},
+        xaxis={'title': f'Contribution to churn {units}', 'gridcolor': 'rgba(255,255,255,0.3)'},
+        yaxis={'title': 'Customer Features', 'gridcolor': 'rgba(255,255,255,0.3)',
+               'categoryorder': 'array', 'categoryarray': features},
+        barmode='relative',
+        height=500,
+        legend={'title': ''}
+    )
+
+    return fig_features
+
+
+def probability_bar(prob):
+    fig_prob = go.Figure(data=[
+        go.Bar(
+            x=['Will Stay', 'Will Churn'],
+            y=[prob[0] * 100, prob[1] * 100],
+            marker=dict(
+                color=['#10b981', '#ef4444'],
+                line=dict(color='white', width=2)
+            ),
+            text=[f'{prob[0]:.1%}', f'{prob[1]:.1%}'],
+            textposition='outside',
+            textfont=dict(size=20, color='white', family='Arial Black')
+        )
+    ])
+
+    fig_prob.update_layout(
+        title='Prediction Confidence',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,0.1)',
+        font={'color': "white", 'family': "Arial"},
+        yaxis={'title': 'Probability (%)', 'gridcolor': 'rgba(255,255,255,0.2)', 'range': [0, 100]},
+        xaxis={'title': '', 'showgrid': False},
+        title_font={'size': 20, 'color': 'white'},
+        height=400,
+        showlegend=False
+    )
+
+    return fig_prob
+
+
+def model_comparison_bar(results, probability_key='churn_probability'):
+    fig_compare = go.Figure(data=[
+        go.Bar(
+            x=[r['model'] for r in results],
+            y=[r[probability_key] * 100 for r in results],
+            marker=dict(color=MODEL_COLORS[:len(results)], line=dict(color='white', width=2)),
+            text=[f"{r[probability_key]:.1%}" for r in results],
+            textposition='outside',
+            textfont=dict(size=18, color='white', family='Arial Black')
+        )
+    ])
+    fig_compare.update_layout(
+        title='Churn Probability by Model',
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,0.1)',
+        font={'color': "white", 'family': "Arial"},
+        yaxis={'title': 'Churn Probability (%)', 'gridcolor': 'rgba(255,255,255,0.2)', 'range': [0, 110]},
+        title_font={'size': 20, 'color': 'white'},
+        height=400,
+        showlegend=False
+    )
+
+    return fig_compare
+
+
+MODEL_COLORS = ['#7e22ce', '#ec4899', '#f59e0b']
+
+
+def _performance_layout(fig, title, xaxis_title, yaxis_title):
+    fig.update_layout(
+        title=title,
+        paper_bgcolor='rgba(0,0,0,0)',
+        plot_bgcolor='rgba(255,255,255,0.1)',
+        font={'color': "white", 'family': "Arial"},
+        xaxis={'title': xaxis_title, 'gridcolor': 'rgba(255,255,255,0.2)'},
+        yaxis={'title': yaxis_title, 'gridcolor': 'rgba(255,255,255,0.2)'},
+        title_font={'size': 20, 'color': 'white'},
+        height=450,
+        legend={'title': ''}
+    )
+    return fig
+
+
+def roc_curves(reports):
+    fig = go.Figure()
+    for color, (name, report) in zip(MODEL_COLORS, reports.items()):
+        fpr, tpr, _ = report.roc()
+        fig.add_trace(go.Scatter(x=fpr, y=tpr, mode='lines', line=dict(color=color, width=3),
+                                 name=f"{name} (AUC {report.roc_auc():.3f})"))
+    fig.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode='lines', line=dict(color='white', dash='dash'),
+                             name='Random'))
+
+    return _performance_layout(fig, 'ROC Curve', 'False Positive Rate', 'True Positive Rate')
+
+
+def pr_curves(reports):
+    fig = go.Figure()
+    for color, (name, report) in zip(MODEL_COLORS, reports.items()):
+        precision, recall, _ = report.precision_recall()
+        fig.add_trace(go.Scatter(x=recall, y=precision, mode='lines', line=dict(color=color, width=3),
+                                 name=f"{name} (AP {report.average_precision():.3f})"))
+
+    return _performance_layout(fig, 'Precision-Recall Curve', 'Recall', 'Precision')
+
+
+def calibration_plot(reports):
+    fig = go.Figure()
+    for color, (name, report) in zip(MODEL_COLORS, reports.items()):
+        table = report.calibration()
+        fig.add_trace(go.Scatter(x=table['mean_predicted'], y=table['observed_rate'], mode='lines+markers',
+                                 line=dict(color=color, width=3), name=name,
+                                 customdata=table['customers'],
+                                 hovertemplate='predicted %{x:.1%}<br>observed %{y:.1%}<br>%{customdata} customers'))
+    fig.add_trace(go.Scatter(x=[0, 1], y=[0, 1], mode='lines', line=dict(color='white', dash='dash'),
+                             name='Perfectly calibrated'))
+
+    return _performance_layout(fig, 'Calibration', 'Mean Predicted Churn Probability', 'Observed Churn Rate')
+
+
+def gains_chart(reports):
+    fig = go.Figure()
+    for color, (name, report) in zip(MODEL_COLORS, reports.items()):
+        table = report.gains()
+        share = table['customers'].cumsum() / table['customers'].sum()
+        fig.add_trace(go.Scatter(x=np.r_[0, share] * 100, y=np.r_[0, table['cumulative_gain']] * 100,
+                                 mode='lines+markers', line=dict(color=color, width=3), name=name))
+    fig.add_trace(go.Scatter(x=[0, 100], y=[0, 100], mode='lines', line=dict(color='white', dash='dash'),
+                             name='Random targeting'))
+
+    return _performance_layout(fig, 'Cumulative Gain', 'Customers Contacted (%)', 'Churners Reached (%)')
+
+
+def retention_value_curves(curves, optima):
+    # curves: {model: frame from RetentionValueSweep.curve()},
+    # optima: {model: RetentionValueSweep.optimize() result}.
+    fig = go.Figure()
+    for color, (name, curve) in zip(MODEL_COLORS, curves.items()):
+        fig.add_trace(go.Scatter(x=curve['threshold'], y=curve['value'], mode='lines',
+                                 line=dict(color=color, width=3), name=name,
+                                 customdata=curve['targeted'],
+                                 hovertemplate='threshold %{x:.3f}<br>value $%{y:,.0f}<br>%{customdata} contacted'))
+        best = optima[name]
+        fig.add_trace(go.Scatter(x=[best['threshold']], y=[best['value']], mode='markers',
+                                 marker=dict(color=color, size=14, line=dict(color='white', width=2)),
+                                 name=f"{name} best", showlegend=False))
+    fig.add_hline(y=0, line=dict(color='white', dash='dash'))
+
+    return _performance_layout(fig, 'Expected Retention Value', 'Decision Threshold', 'Value on Held-out Customers ($)')
+
+
+def what_if_chart(table, model_name, feature, current_value, current_probability, threshold=0.5):
+    # Churn probability for every value tried for one feature, with the
+    # customer's own value marked and the decision threshold as a line.
+    rows = table[table['feature'] == feature]
+    values = list(rows['value']) + [current_value]
+    probs = np.r_[rows[f"{model_name} probability"].to_numpy(), current_probability] * 100
+    is_numeric = all(isinstance(v, (int, float, np.number)) for v in values)
+
+    if is_numeric:
+        order = np.argsort(np.asarray(values, dtype=np.float64), kind="stable")
+        fig = go.Figure(go.Scatter(x=np.asarray(values, dtype=np.float64)[order], y=probs[order],
+                                   mode='lines+markers', line=dict(color='#7e22ce', width=3), name=feature))
+        fig.add_trace(go.Scatter(x=[current_value], y=[current_probability * 100], mode='markers',
+                                 marker=dict(color='white', size=14, line=dict(color='#7e22ce', width=3)),
+                                 name='This customer'))
+    else:
+        colors = ['#ef4444' if p > threshold * 100 else '#10b981' for p in probs]
+        colors[-1] = '#7e22ce'
+        fig = go.Figure(go.Bar(x=[str(v) for v in values], y=probs, marker=dict(color=colors),
+                               text=[f"{p:.1f}%" for p in probs], textposition='outside', showlegend=False))
+    fig.add_hline(y=threshold * 100, line=dict(color='white', dash='dash'))
+
+    fig = _performance_layout(fig, f"Churn Probability by {feature}", feature, 'Churn Probability (%)')
+    fig.update_layout(yaxis={'range': [0, 105]}, height=400)
+    return fig
+
+
+def confusion_heatmap(tn, fp, fn, tp):
+    fig = go.Figure(data=go.Heatmap(
+        z=[[tn, fp], [fn, tp]],
+        x=['Predicted Stay', 'Predicted Churn'],
+        y=['Actually Stayed', 'Actually Churned'],
+        text=[[f"{tn:,}", f"{fp:,}"], [f"{fn:,}", f"{tp:,}"]],
+        texttemplate='%{text}',
+        textfont={'size': 22},
+        colorscale='Purples',
+        showscale=False
+    ))
+    fig.update_layout(
+        title='Confusion Matrix',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font={'color': "white", 'family': "Arial"},
+        title_font={'size': 20, 'color': 'white'},
+        yaxis={'autorange': 'reversed'},
+        height=400
+    )
+
+    return fig
@@ -0,0 +1,287 @@
+import argparse
+import datetime
+import os
+import sqlite3
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.artifacts import file_sha256
+from src.batch_scoring import DEFAULT_CHUNKSIZE, ID_COLUMN, read_chunks
+from src.decision import DecisionPolicy
+from src.model_training import ModelRegistry, needs_scaling
+from src.preprocessing import INPUT_FEATURES, NUMERIC_FEATURES, get_feature_pipeline
+
+DEFAULT_DB_PATH = os.path.join("data", "score_store.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    customer_id   TEXT NOT NULL,
+    model         TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    probability   REAL NOT NULL,
+    prediction    INTEGER NOT NULL,
+    scored_at     TEXT NOT NULL,
+    feature_hash  INTEGER,
+    PRIMARY KEY (customer_id, model)
+);
+CREATE TABLE IF NOT EXISTS score_history (
+    run_id        INTEGER NOT NULL,
+    customer_id   TEXT NOT NULL,
+    model         TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    probability   REAL NOT NULL,
+    prediction    INTEGER NOT NULL,
+    scored_at     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS score_history_customer ON score_history (customer_id, scored_at);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    input      TEXT NOT NULL,
+    rows       INTEGER,
+    changed    INTEGER,
+    rescored   INTEGER,
+    seconds    REAL
+);
+"""
+
+# True when a customer has no score from this model version on these
+# exact inputs. The hash is kept per model, so a run with --models for a
+# subset leaves the other models stale until they are run too.
+MODEL_STALE_SQL = (
+    "NOT EXISTS (SELECT 1 FROM scores AS s WHERE s.customer_id = i.customer_id AND s.model = ? "
+    "AND s.model_version = ? AND s.feature_hash = i.feature_hash)"
+)
+# True when no model has scored these inputs yet: a new or changed customer.
+CHANGED_SQL = (
+    "NOT EXISTS (SELECT 1 FROM scores AS s WHERE s.customer_id = i.customer_id "
+    "AND s.feature_hash = i.feature_hash)"
+)
+
+
+def stale_rows_query(n_models):
+    # One pass over the staged chunk returning only the rows that some model
+    # has to rescore, with a changed flag and one stale flag per model.
+    flags = ", ".join(f"{MODEL_STALE_SQL} AS stale_{k}" for k in range(n_models))
+    any_stale = " OR ".join(f"stale_{k}" for k in range(n_models)) or "0"
+    return (
+        f"SELECT i.position, {CHANGED_SQL} AS changed, {flags} "
+        f"FROM incoming AS i WHERE {any_stale}"
+    )
+
+
+def connect(db_path=DEFAULT_DB_PATH):
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    # Stores from before per-model hashes: their scores carry no hash, so
+    # every customer is rescored once.
+    if "feature_hash" not in {row[1] for row in conn.execute("PRAGMA table_info(scores)")}:
+        conn.execute("ALTER TABLE scores ADD COLUMN feature_hash INTEGER")
+    conn.execute("DROP TABLE IF EXISTS customers")
+    conn.commit()
+    return conn
+
+
+def feature_hashes(df):
+    # 64-bit hash of each customer's raw model inputs, normalized so the
+    # dtype pandas happens to infer for a chunk does not matter: numbers
+    # are hashed as float64 (tenure 1, 1.0 and "1" alike, blank -> NaN),
+    # categories as stripped text.
+    normalized = {}
+    for feature in INPUT_FEATURES:
+        if feature not in df.columns:
+            continue
+        if feature in NUMERIC_FEATURES:
+            normalized[feature] = pd.to_numeric(df[feature], errors="coerce").astype(np.float64)
+        else:
+            normalized[feature] = df[feature].fillna("").astype(str).str.strip()
+    raw = pd.DataFrame(normalized, index=df.index)
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy().view(np.int64)
+
+
+def model_versions(registry, names, policy):
+    # Content hashes rather than mtimes, so a fresh checkout or copy of the
+    # same pickle does not force a full rescore. The decision threshold is
+    # part of the version because stored predictions depend on it.
+    return {name: f"{file_sha256(registry.paths[name])[:16]}@{policy.threshold(name):g}" for name in names}
+
+
+def _stage_chunk(conn, chunk):
+    ids = chunk[ID_COLUMN].astype(str).to_numpy()
+    hashes = feature_hashes(chunk)
+
+    conn.execute("DROP TABLE IF EXISTS temp.incoming")
+    conn.execute(
+        "CREATE TEMP TABLE incoming (customer_id TEXT PRIMARY KEY, feature_hash INTEGER, position INTEGER)"
+    )
+    # Later rows win if a customer appears twice in the same extract.
+    conn.executemany(
+        "INSERT OR REPLACE INTO incoming VALUES (?, ?, ?)",
+        zip(ids.tolist(), hashes.tolist(), range(len(ids))),
+    )
+
+    return ids, hashes
+
+
+def rescore_chunk(conn, chunk, run_id, models, versions, pipeline, policy):
+    ids, hashes = _stage_chunk(conn, chunk)
+    names = list(models)
+    params = [value for name in names for value in (name, versions[name])]
+    flags = np.array(conn.execute(stale_rows_query(len(names)), params).fetchall(), dtype=np.intp)
+    flags = flags.reshape(-1, len(names) + 2)
+
+    positions = flags[:, 0]
+    stale = {name: positions[flags[:, k + 2] == 1] for k, name in enumerate(names)}
+    changed = int(flags[:, 1].sum())
+
+    rescored = {name: len(rows) for name, rows in stale.items()}
+    positions = np.sort(positions)
+    if len(positions) == 0:
+        return changed, rescored
+
+    # Encode only the rows that some model has to rescore.
+    X = pipeline.encode_frame(chunk.iloc[positions], scale=False)
+    X_scaled = None
+    local = np.full(len(chunk), -1, dtype=np.intp)
+    local[positions] = np.arange(len(positions))
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+
+    for name, model in models.items():
+        rows = stale[name]
+        if len(rows) == 0:
+            continue
+        if needs_scaling(name):
+            if X_scaled is None:
+                X_scaled = pipeline.scale(X)
+            prob = model.predict_proba(X_scaled[local[rows]])
+        else:
+            prob = model.predict_proba(X[local[rows]])
+        labels = policy.decide(name, prob[:, 1])
+
+        records = [
+            (customer_id, name, versions[name], float(p), int(label), now)
+            for customer_id, p, label in zip(ids[rows].tolist(), prob[:, 1].tolist(), labels.tolist())
+        ]
+        conn.executemany(
+            "INSERT OR REPLACE INTO scores "
+            "(customer_id, model, model_version, probability, prediction, scored_at, feature_hash) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(*record, feature_hash) for record, feature_hash in zip(records, hashes[rows].tolist())],
+        )
+        conn.executemany(
+            "INSERT INTO score_history VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(run_id, *record) for record in records],
+        )
+
+    return changed, rescored
+
+
+def rescore_file(input_path, db_path=DEFAULT_DB_PATH, model_names=None, chunksize=DEFAULT_CHUNKSIZE,
+                 registry=None, pipeline=None):
+    # Streams the extract and rescores only new or changed customers, plus
+    # everyone scored by an older model version. Each chunk is committed on
+    # its own, so an interrupted run keeps the work already done.
+    registry = ModelRegistry() if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+    model_names = registry.available() if model_names is None else model_names
+    models = {name: registry.get(name) for name in model_names}
+    policy = DecisionPolicy.load()
+    versions = model_versions(registry, model_names, policy)
+
+    conn = connect(db_path)
+    start = time.perf_counter()
+    run_id = conn.execute(
+        "INSERT INTO runs (started_at, input) VALUES (?, ?)",
+        (datetime.datetime.now().isoformat(timespec="seconds"), os.path.abspath(input_path)),
+    ).lastrowid
+    conn.commit()
+
+    n_rows = 0
+    n_changed = 0
+    rescored = dict.fromkeys(models, 0)
+    try:
+        for chunk in read_chunks(input_path, chunksize):
+            if ID_COLUMN not in chunk.columns:
+                raise ValueError(f"Incremental scoring needs a {ID_COLUMN} column in {input_path}")
+
+            chunk = chunk.reset_index(drop=True)
+            with conn:
+                changed, chunk_rescored = rescore_chunk(conn, chunk, run_id, models, versions, pipeline, policy)
+            n_rows += len(chunk)
+            n_changed += changed
+            for name, count in chunk_rescored.items():
+                rescored[name] += count
+
+        elapsed = time.perf_counter() - start
+        with conn:
+            conn.execute(
+                "UPDATE runs SET rows = ?, changed = ?, rescored = ?, seconds = ? WHERE run_id = ?",
+                (n_rows, n_changed, max(rescored.values(), default=0), elapsed, run_id),
+            )
+    finally:
+        conn.close()
+
+    return {
+        "run_id": run_id,
+        "rows": n_rows,
+        "changed": n_changed,
+        "rescored": rescored,
+        "seconds": elapsed,
+    }
+
+
+def score_history(customer_id, db_path=DEFAULT_DB_PATH):
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(
+            "SELECT scored_at, model, model_version, probability, prediction, run_id "
+            "FROM score_history WHERE customer_id = ? ORDER BY scored_at, model",
+            conn, params=(customer_id,),
+        )
+
+
+def latest_scores(db_path=DEFAULT_DB_PATH, model=None):
+    query = "SELECT customer_id, model, model_version, probability, prediction, scored_at FROM scores"
+    params = ()
+    if model is not None:
+        query += " WHERE model = ?"
+        params = (model,)
+
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql_query(query, conn, params=params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rescore only new or changed customers and keep a score history.")
+    parser.add_argument("input", nargs="?", help="CSV or Parquet extract with a customerID column")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH)
+    parser.add_argument("--models", nargs="+", default=None, help="Model names to run (default: all)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--history", metavar="CUSTOMER_ID", help="Print one customer's score history and exit")
+    args = parser.parse_args()
+
+    if args.history:
+        print(score_history(args.history, args.db).to_string(index=False))
+        return
+    if args.input is None:
+        parser.error("an input file is required unless --history is given")
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+
+    stats = rescore_file(args.input, args.db, args.models, args.chunksize)
+
+    print(f"Run {stats['run_id']}: {stats['rows']:,} rows, {stats['changed']:,} new or changed, "
+          f"in {stats['seconds']:.2f}s")
+    for name, count in stats["rescored"].items():
+        print(f"  {name:<20} rescored {count:,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+import atexit
+import collections
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+import numpy as np
+
+# CHURN_METRICS=1 turns the timing spans on. CHURN_PROFILE=<file> starts a
+# sampling profiler that samples every CHURN_PROFILE_INTERVAL_MS and writes
+# collapsed stacks (flame graph input) to <file> at exit.
+METRICS_ENV = "CHURN_METRICS"
+PROFILE_ENV = "CHURN_PROFILE"
+PROFILE_INTERVAL_ENV = "CHURN_PROFILE_INTERVAL_MS"
+DEFAULT_PROFILE_INTERVAL_MS = 5.0
+METRIC_NAME = "churn_stage_seconds"
+METRICS_FILE = os.path.join("benchmarks", "results", "metrics.prom")
+
+# Upper bounds in seconds, from 50 µs (a cached single-row lookup) up to a
+# full batch chunk.
+BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+
+class Histogram:
+    # Cumulative Prometheus-style histogram of one stage's durations.
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += seconds
+            self.count += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation; the last
+        # bucket reports the largest value seen.
+        if not self.count:
+            return 0.0
+        position = int(np.searchsorted(np.cumsum(self.counts), q * self.count, side="left"))
+        return self.buckets[position] if position < len(self.buckets) else self.max
+
+
+class MetricsRegistry:
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram())
+        return histogram
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def summary(self):
+        return [
+            {
+                "stage": stage,
+                "count": histogram.count,
+                "total_ms": histogram.sum * 1000.0,
+                "mean_ms": histogram.sum / histogram.count * 1000.0 if histogram.count else 0.0,
+                "p50_ms": histogram.quantile(0.5) * 1000.0,
+                "p95_ms": histogram.quantile(0.95) * 1000.0,
+                "max_ms": histogram.max * 1000.0,
+            }
+            for stage, histogram in sorted(self.histograms.items())
+        ]
+
+    def prometheus_text(self):
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each stage of the churn scoring pipeline.",
+            f"# TYPE {METRIC_NAME} histogram",
+        ]
+        for stage, histogram in sorted(self.histograms.items()):
+            label = stage.replace("\\", "\\\\").replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{stage="{label}",le="+Inf"}} {histogram.count}')
+            lines.append(f'{METRIC_NAME}_sum{{stage="{label}"}} {histogram.sum:.9f}')
+            lines.append(f'{METRIC_NAME}_count{{stage="{label}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=METRICS_FILE):
+        # Written to a temp file and renamed, so a node_exporter textfile
+        # collector never reads a half-written file.
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+        return path
+
+
+METRICS = MetricsRegistry(enabled=os.environ.get(METRICS_ENV, "").lower() in ("1", "true", "yes"))
+
+
+class _Span:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        METRICS.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_SPAN = _NoSpan()
+
+
+def span(stage):
+    # `with span("predict_proba"): ...`. Disabled, this is one attribute
+    # check and a shared do-nothing context manager.
+    return _Span(stage) if METRICS.enabled else _NO_SPAN
+
+
+def timed(stage):
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not METRICS.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                METRICS.observe(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def enable(enabled=True):
+    METRICS.enabled = enabled
+
+
+class SamplingProfiler:
+    # Samples every thread's Python stack at a fixed interval and counts the
+    # collapsed stacks ("file:function;file:function ... count"), the input
+    # format of flamegraph.pl and speedscope.
+
+    def __init__(self, interval_ms=DEFAULT_PROFILE_INTERVAL_MS):
+        self.interval = interval_ms / 1000.0
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            sampled = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                sampled.append(";".join(reversed(stack)))
+            with self._lock:
+                self.stacks.update(sampled)
+                self.samples += 1
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def collapsed(self):
+        with self._lock:
+            stacks = self.stacks.most_common()
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def write(self, path):
+        with open(path, "w") as f:
+            f.write(self.collapsed())
+        return path
+
+
+_profiler = None
+
+
+def get_profiler():
+    return _profiler
+
+
+def start_profiler_from_env():
+    # Starts at most one profiler per process, only when CHURN_PROFILE is set.
+    global _profiler
+    path = os.environ.get(PROFILE_ENV)
+    if not path or _profiler is not None:
+        return _profiler
+
+    interval = float(os.environ.get(PROFILE_INTERVAL_ENV, DEFAULT_PROFILE_INTERVAL_MS))
+    _profiler = SamplingProfiler(interval).start()
+
+    def _write():
+        _profiler.stop()
+        _profiler.write(path)
+
+    atexit.register(_write)
+    return _profiler
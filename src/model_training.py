@@ -1,21 +1,127 @@
 import joblib
 import os
+import threading
+import warnings
 
-def load_all_models():
-    base_path = "models"
+from src.metrics import span
 
-    models = {}
+BASE_PATH = "models"
+COMPILED_DIR = os.path.join(BASE_PATH, "compiled")
 
-    models["Logistic Regression"] = joblib.load(
-        os.path.join(base_path, "logistic_regression_model.pkl")
-    )
+MODEL_FILES = {
+    "Logistic Regression": "logistic_regression_model.pkl",
+    "Decision Tree": "decision_tree_model.pkl",
+    "Random Forest": "random_forest_model.pkl",
+}
 
-    models["Decision Tree"] = joblib.load(
-        os.path.join(base_path, "decision_tree_model.pkl")
-    )
+# Models trained on standardized features; the trees were fitted on raw
+# feature values and must be served unscaled.
+SCALED_MODELS = {"Logistic Regression"}
 
-    models["Random Forest"] = joblib.load(
-        os.path.join(base_path, "random_forest_model.pkl")
-    )
 
-    return models
\ No newline at end of file
+# "native" serves tree models through src.tree_engine (same probabilities,
+# far less per-call overhead); "sklearn" keeps the original estimator.
+ENGINES = ("native", "sklearn")
+DEFAULT_ENGINE = "native"
+
+
+def needs_scaling(model_name):
+    return model_name in SCALED_MODELS
+
+
+def engine_for(engine, model_name):
+    # engine is either one engine name for every model or a {model: engine} dict.
+    if isinstance(engine, dict):
+        engine = engine.get(model_name, DEFAULT_ENGINE)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown inference engine {engine!r}; expected one of {ENGINES}")
+    return engine
+
+
+class ModelRegistry:
+    # Knows which model artifacts exist on disk and loads each one only the
+    # first time it is asked for. A fresh memory-mapped export in
+    # compiled_dir (see src.artifacts) is preferred over unpickling.
+
+    def __init__(self, base_path=BASE_PATH, model_files=None, compiled_dir=COMPILED_DIR,
+                 engine=DEFAULT_ENGINE):
+        model_files = MODEL_FILES if model_files is None else model_files
+        self.base_path = base_path
+        self.compiled_dir = compiled_dir
+        self.engine = engine
+        self.paths = {
+            name: os.path.join(base_path, file_name)
+            for name, file_name in model_files.items()
+        }
+        self._models = {}
+        self._locks = {name: threading.Lock() for name in self.paths}
+
+    def names(self):
+        return list(self.paths)
+
+    def available(self):
+        return [name for name, path in self.paths.items() if os.path.exists(path)]
+
+    def is_available(self, name):
+        return name in self.paths and os.path.exists(self.paths[name])
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def version(self, name):
+        # Changes whenever the artifact on disk is replaced.
+        stat = os.stat(self.paths[name])
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self.paths:
+            raise KeyError(f"Unknown model: {name}")
+
+        with self._locks[name]:
+            if name not in self._models:
+                with span(f"load_model:{name}"):
+                    self._models[name] = self._load(name)
+
+        return self._models[name]
+
+    def _load(self, name):
+        if engine_for(self.engine, name) == "sklearn":
+            return joblib.load(self.paths[name])
+
+        if self.compiled_dir is not None:
+            from src.artifacts import StaleArtifactError, load_compiled_model
+
+            try:
+                model = load_compiled_model(name, self.compiled_dir, self.base_path)
+            except StaleArtifactError as exc:
+                warnings.warn(f"{exc} Falling back to the pickle.")
+                model = None
+            if model is not None:
+                return model
+
+        from src.tree_engine import compile_model
+
+        return compile_model(joblib.load(self.paths[name]))
+
+    def load_all(self):
+        return {name: self.get(name) for name in self.available()}
+
+    def warm(self, names=None):
+        names = self.available() if names is None else names
+
+        def _load():
+            for name in names:
+                self.get(name)
+
+        thread = threading.Thread(target=_load, name="model-warmup", daemon=True)
+        thread.start()
+
+        return thread
+
+
+def load_all_models(engine=DEFAULT_ENGINE):
+    return ModelRegistry(engine=engine).load_all()
@@ -0,0 +1,317 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.cohort_index import index_fingerprint
+from src.model_training import BASE_PATH, ModelRegistry, needs_scaling
+from src.preprocessing import CATEGORICAL_FEATURES, NUMERIC_FEATURES, get_feature_pipeline
+
+DATA_PATH = "data/Telco-Customer-Churn.csv"
+PROFILE_FILE = os.path.join(BASE_PATH, "monitoring_profile.json")
+QUANTILES = np.linspace(0.1, 0.9, 9)
+RAW_CATEGORICALS = [feature for feature in CATEGORICAL_FEATURES if feature != "TenureGroup"]
+
+# Usual PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 drifted.
+PSI_WARN = 0.1
+PSI_DRIFT = 0.25
+# Largest gap between the binned CDFs: 0.1 is a noticeable shift, 0.2 a
+# large one. Catches a shift concentrated in a few bins that PSI dilutes.
+KS_WARN = 0.1
+KS_DRIFT = 0.2
+# Share of rows with an unseen category or an out-of-range value that
+# counts as a data-quality failure rather than a warning.
+QUALITY_DRIFT = 0.01
+PSI_FLOOR = 1e-4
+MAX_UNSEEN_EXAMPLES = 10
+
+
+def _numeric_values(series):
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _numeric_reference(values):
+    valid = values[~np.isnan(values)]
+    edges = np.unique(np.quantile(valid, QUANTILES))
+    return {
+        "edges": edges.tolist(),
+        "counts": np.bincount(np.searchsorted(edges, valid, side="right"), minlength=len(edges) + 1).tolist(),
+        "missing": int(np.isnan(values).sum()),
+        "min": float(valid.min()),
+        "max": float(valid.max()),
+    }
+
+
+def build_profile(data_path=DATA_PATH, registry=None, pipeline=None):
+    # Binned reference distribution of every raw input and of each model's
+    # churn probability on the training data. Bin edges are the reference
+    # deciles, so each bin holds about a tenth of the reference rows.
+    registry = ModelRegistry() if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+    df = pd.read_csv(data_path)
+
+    profile = {
+        "fingerprint": index_fingerprint(data_path, registry, pipeline),
+        "rows": len(df),
+        "numeric": {feature: _numeric_reference(_numeric_values(df[feature])) for feature in NUMERIC_FEATURES},
+        "categorical": {},
+        "probability": {},
+    }
+
+    for feature in RAW_CATEGORICALS:
+        counts = df[feature].value_counts(dropna=True)
+        profile["categorical"][feature] = {
+            "levels": counts.index.tolist(),
+            "counts": counts.astype(int).tolist(),
+            "missing": int(df[feature].isna().sum()),
+        }
+
+    X = pipeline.encode_frame(df, scale=False)
+    X_scaled = pipeline.scale(X)
+    for name in registry.available():
+        prob = registry.get(name).predict_proba(X_scaled if needs_scaling(name) else X)[:, 1]
+        profile["probability"][name] = _numeric_reference(prob)
+
+    return profile
+
+
+def save_profile(profile, path=PROFILE_FILE):
+    # Written aside and renamed, so a reader never sees a partial file.
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(profile, f)
+    os.replace(tmp_path, path)
+
+
+def load_profile(path=PROFILE_FILE, data_path=DATA_PATH, registry=None, pipeline=None):
+    # Rebuilt (and re-saved) when the data, a model or the pipeline changed.
+    registry = ModelRegistry() if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+
+    if os.path.exists(path):
+        with open(path) as f:
+            profile = json.load(f)
+        if profile.get("fingerprint") == index_fingerprint(data_path, registry, pipeline):
+            return profile
+
+    profile = build_profile(data_path, registry, pipeline)
+    save_profile(profile, path)
+    return profile
+
+
+def psi(actual, expected):
+    # Population stability index between two count vectors over the same bins.
+    actual = np.maximum(np.asarray(actual, dtype=np.float64) / max(np.sum(actual), 1), PSI_FLOOR)
+    expected = np.maximum(np.asarray(expected, dtype=np.float64) / max(np.sum(expected), 1), PSI_FLOOR)
+    return float(np.sum((actual - expected) * np.log(actual / expected)))
+
+
+def binned_ks(actual, expected):
+    # KS statistic on the binned CDFs: a lower bound of the exact KS, which
+    # would need every value kept.
+    if not np.sum(actual) or not np.sum(expected):
+        return 0.0
+    return float(np.max(np.abs(np.cumsum(actual) / np.sum(actual) - np.cumsum(expected) / np.sum(expected))))
+
+
+def drift_status(psi_values, ks_values, quality):
+    # "drift", "warn" or "ok" per feature. ks is NaN for categoricals,
+    # which never trips a KS threshold.
+    psi_values = np.asarray(psi_values, dtype=np.float64)
+    ks_values = np.nan_to_num(np.asarray(ks_values, dtype=np.float64))
+    quality = np.asarray(quality, dtype=np.float64)
+    return np.select(
+        [(psi_values >= PSI_DRIFT) | (ks_values >= KS_DRIFT) | (quality >= QUALITY_DRIFT),
+         (psi_values >= PSI_WARN) | (ks_values >= KS_WARN) | (quality > 0)],
+        ["drift", "warn"],
+        default="ok",
+    )
+
+
+class _NumericSketch:
+
+    def __init__(self, reference):
+        self.edges = np.asarray(reference["edges"], dtype=np.float64)
+        self.low = reference["min"]
+        self.high = reference["max"]
+        self.counts = np.zeros(len(self.edges) + 1, dtype=np.int64)
+        self.missing = 0
+        self.out_of_range = 0
+
+    def update(self, values):
+        missing = np.isnan(values)
+        valid = values[~missing]
+        self.counts += np.bincount(np.searchsorted(self.edges, valid, side="right"), minlength=len(self.counts))
+        self.missing += int(missing.sum())
+        self.out_of_range += int(np.count_nonzero((valid < self.low) | (valid > self.high)))
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.missing += other.missing
+        self.out_of_range += other.out_of_range
+
+
+class _CategoricalSketch:
+
+    def __init__(self, reference):
+        self.levels = list(reference["levels"])
+        self.counts = np.zeros(len(self.levels), dtype=np.int64)
+        self.missing = 0
+        self.unseen = 0
+        self.unseen_examples = {}
+
+    def update(self, series):
+        codes = pd.Categorical(series, categories=self.levels).codes
+        known = codes >= 0
+        self.counts += np.bincount(codes[known], minlength=len(self.levels))
+
+        missing = series.isna().to_numpy()
+        self.missing += int(missing.sum())
+        unseen = ~known & ~missing
+        n_unseen = int(unseen.sum())
+        if n_unseen:
+            self.unseen += n_unseen
+            # Only a bounded sample of the unseen values is kept.
+            if len(self.unseen_examples) < MAX_UNSEEN_EXAMPLES:
+                for value, count in series[unseen].value_counts().items():
+                    if value in self.unseen_examples or len(self.unseen_examples) < MAX_UNSEEN_EXAMPLES:
+                        self.unseen_examples[value] = self.unseen_examples.get(value, 0) + int(count)
+
+    def merge(self, other):
+        self.counts += other.counts
+        self.missing += other.missing
+        self.unseen += other.unseen
+        for value, count in other.unseen_examples.items():
+            if value in self.unseen_examples or len(self.unseen_examples) < MAX_UNSEEN_EXAMPLES:
+                self.unseen_examples[value] = self.unseen_examples.get(value, 0) + count
+
+
+class DriftMonitor:
+    # Streaming counts of every raw input and of each model's probabilities
+    # over the reference bins. Memory is fixed by the profile (a few dozen
+    # counters per feature); update() is vectorized per chunk and constant
+    # work per row, so it can run inline with batch scoring.
+
+    def __init__(self, profile):
+        self.profile = profile
+        self.rows = 0
+        self.numeric = {feature: _NumericSketch(ref) for feature, ref in profile["numeric"].items()}
+        self.categorical = {feature: _CategoricalSketch(ref) for feature, ref in profile["categorical"].items()}
+        self.probability = {name: _NumericSketch(ref) for name, ref in profile["probability"].items()}
+
+    def update(self, df, probabilities=None):
+        # df holds raw input rows; probabilities maps model name to the
+        # churn probabilities scored for those rows.
+        self.rows += len(df)
+        for feature, sketch in self.numeric.items():
+            if feature in df.columns:
+                sketch.update(_numeric_values(df[feature]))
+            else:
+                sketch.missing += len(df)
+        for feature, sketch in self.categorical.items():
+            if feature in df.columns:
+                sketch.update(df[feature])
+            else:
+                sketch.missing += len(df)
+        for name, prob in (probabilities or {}).items():
+            if name in self.probability:
+                self.probability[name].update(np.asarray(prob, dtype=np.float64))
+
+    def merge(self, other):
+        # Combines a monitor fed with another part of the same traffic
+        # (e.g. another batch-scoring worker).
+        self.rows += other.rows
+        for group, other_group in ((self.numeric, other.numeric), (self.categorical, other.categorical),
+                                   (self.probability, other.probability)):
+            for key, sketch in group.items():
+                sketch.merge(other_group[key])
+        return self
+
+    def _numeric_row(self, feature, kind, sketch, reference):
+        seen = int(sketch.counts.sum())
+        rows = seen + sketch.missing
+        actual = np.r_[sketch.counts, sketch.missing]
+        expected = np.r_[reference["counts"], reference["missing"]]
+        return {
+            "feature": feature,
+            "kind": kind,
+            "rows": rows,
+            "psi": psi(actual, expected) if rows else 0.0,
+            "ks": binned_ks(sketch.counts, reference["counts"]),
+            "missing_share": sketch.missing / rows if rows else 0.0,
+            "out_of_range_share": sketch.out_of_range / seen if seen else 0.0,
+            "unseen_share": 0.0,
+            "unseen_examples": "",
+        }
+
+    def report(self):
+        rows = []
+        for feature, sketch in self.numeric.items():
+            rows.append(self._numeric_row(feature, "numeric", sketch, self.profile["numeric"][feature]))
+
+        for feature, sketch in self.categorical.items():
+            reference = self.profile["categorical"][feature]
+            total = int(sketch.counts.sum()) + sketch.unseen + sketch.missing
+            actual = np.r_[sketch.counts, sketch.unseen, sketch.missing]
+            expected = np.r_[reference["counts"], 0, reference["missing"]]
+            rows.append({
+                "feature": feature,
+                "kind": "categorical",
+                "rows": total,
+                "psi": psi(actual, expected) if total else 0.0,
+                "ks": np.nan,
+                "missing_share": sketch.missing / total if total else 0.0,
+                "out_of_range_share": 0.0,
+                "unseen_share": sketch.unseen / total if total else 0.0,
+                "unseen_examples": ", ".join(f"{value!s} ({count})" for value, count in sketch.unseen_examples.items()),
+            })
+
+        for name, sketch in self.probability.items():
+            if sketch.counts.sum():
+                rows.append(self._numeric_row(f"{name} probability", "prediction", sketch,
+                                              self.profile["probability"][name]))
+
+        report = pd.DataFrame(rows)
+        if len(report):
+            quality = report[["out_of_range_share", "unseen_share"]].max(axis=1)
+            report["status"] = drift_status(report["psi"], report["ks"], quality)
+        return report
+
+
+def monitor_file(input_path, profile=None, chunksize=100_000):
+    # Input-only check of a customer file (no scoring).
+    from src.batch_scoring import read_chunks
+
+    monitor = DriftMonitor(load_profile() if profile is None else profile)
+    for chunk in read_chunks(input_path, chunksize):
+        monitor.update(chunk)
+    return monitor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check a customer file for drift against the training data.")
+    parser.add_argument("input", nargs="?", help="CSV or Parquet file shaped like the dataset")
+    parser.add_argument("--build", action="store_true", help="Rebuild the reference profile and exit")
+    parser.add_argument("--profile", default=PROFILE_FILE)
+    args = parser.parse_args()
+
+    if args.build:
+        start = time.perf_counter()
+        profile = build_profile()
+        save_profile(profile, args.profile)
+        print(f"Profiled {profile['rows']:,} reference rows in {time.perf_counter() - start:.2f}s -> {args.profile}")
+        return
+    if args.input is None:
+        parser.error("an input file is required unless --build is given")
+
+    start = time.perf_counter()
+    monitor = monitor_file(args.input, load_profile(args.profile))
+    print(f"Checked {monitor.rows:,} rows in {time.perf_counter() - start:.2f}s")
+    print(monitor.report().round(4).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
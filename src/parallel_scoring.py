@@ -0,0 +1,197 @@
+import io
+import multiprocessing
+import os
+import time
+
+import pandas as pd
+
+from src.calibration import load_calibration
+from src.decision import DecisionPolicy
+from src.model_training import load_all_models
+from src.preprocessing import load_feature_pipeline
+
+# Scoring itself is the cheap part of a batch run; parsing, encoding and
+# formatting the output dominate. So every worker parses its own slice of
+# the input file and formats its own output, and the parent only splits the
+# file into byte ranges and appends finished slices in order. Nothing but
+# (start, end) offsets and the formatted output crosses process boundaries.
+#
+# Models, the feature pipeline, the decision policy and the calibration are
+# loaded once in the parent and inherited by forked workers copy-on-write;
+# with the native engine the compiled model arrays are memory-mapped, so
+# workers share those pages even under the spawn start method.
+
+# Set in the parent before the pool forks, or by _init_worker under spawn.
+_worker = {}
+
+
+def csv_ranges(path, target_rows, sample_bytes=1 << 20):
+    # Newline-aligned (start, end) byte ranges of roughly target_rows rows
+    # each, plus the header line. Assumes no newlines inside quoted fields,
+    # which holds for files shaped like the Telco extract.
+    size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        sample = f.read(sample_bytes)
+        bytes_per_row = len(sample) / max(sample.count(b"\n"), 1)
+        step = max(int(bytes_per_row * target_rows), 1)
+
+        ranges = []
+        start = data_start
+        while start < size:
+            f.seek(min(start + step, size))
+            f.readline()
+            end = min(f.tell(), size)
+            ranges.append((start, end))
+            start = end
+
+    return header.decode("utf-8").rstrip("\r\n").split(","), ranges
+
+
+def parquet_ranges(path, target_rows):
+    # Consecutive row groups adding up to roughly target_rows rows.
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    ranges = []
+    group = []
+    rows = 0
+    for index in range(metadata.num_row_groups):
+        group.append(index)
+        rows += metadata.row_group(index).num_rows
+        if rows >= target_rows:
+            ranges.append(tuple(group))
+            group = []
+            rows = 0
+    if group:
+        ranges.append(tuple(group))
+
+    return None, ranges
+
+
+def _read_slice(task):
+    path = _worker["input_path"]
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        return pq.ParquetFile(path).read_row_groups(list(task)).to_pandas()
+
+    start, end = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return pd.read_csv(io.BytesIO(data), header=None, names=_worker["columns"])
+
+
+def _init_worker(state):
+    # Under fork the parent's state is already here; spawned workers load
+    # their own copy (compiled models are memory-mapped, so still shared).
+    if "models" in _worker:
+        return
+    _worker.update(state)
+    _worker["models"] = load_all_models(state["engine"])
+    if state["model_names"] is not None:
+        _worker["models"] = {name: _worker["models"][name] for name in state["model_names"]}
+    _worker["pipeline"] = load_feature_pipeline()
+
+
+def _score_slice(args):
+    from src.batch_scoring import score_frame
+
+    position, task = args
+    t0 = time.perf_counter()
+    chunk = _read_slice(task)
+    t1 = time.perf_counter()
+    result = score_frame(chunk, _worker["models"], _worker["pipeline"], _worker["policy"], _worker["calibration"])
+    monitor = None
+    if _worker["profile"] is not None:
+        from src.batch_scoring import model_slug
+        from src.monitoring import DriftMonitor
+
+        # A fresh monitor per slice; the parent merges them.
+        monitor = DriftMonitor(_worker["profile"])
+        monitor.update(chunk, {name: result[f"{model_slug(name)}_probability"] for name in _worker["models"]})
+    t2 = time.perf_counter()
+
+    if _worker["output_csv"]:
+        payload = result.to_csv(index=False, header=position == 0).encode("utf-8")
+    else:
+        payload = result
+    t3 = time.perf_counter()
+
+    return len(chunk), payload, monitor, {"read": t1 - t0, "score": t2 - t1, "format": t3 - t2}
+
+
+def score_file_parallel(input_path, output_path, model_names=None, chunksize=None, workers=None,
+                        engine=None, models=None, pipeline=None, monitor=None, calibrate=True):
+    from src.batch_scoring import BATCH_ENGINE, DEFAULT_CHUNKSIZE, ScoresWriter
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = chunksize or DEFAULT_CHUNKSIZE
+    engine = engine or BATCH_ENGINE
+    if models is None:
+        models = load_all_models(engine)
+    if model_names is not None:
+        models = {name: models[name] for name in model_names}
+    if pipeline is None:
+        pipeline = load_feature_pipeline()
+
+    start = time.perf_counter()
+    if input_path.endswith(".parquet"):
+        columns, ranges = parquet_ranges(input_path, chunksize)
+    else:
+        columns, ranges = csv_ranges(input_path, chunksize)
+
+    output_csv = not output_path.endswith(".parquet")
+    state = {
+        "input_path": input_path,
+        "columns": columns,
+        "output_csv": output_csv,
+        "policy": DecisionPolicy.load(),
+        "calibration": load_calibration() if calibrate else None,
+        "engine": engine,
+        "model_names": list(models),
+        "profile": None if monitor is None else monitor.profile,
+    }
+
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else "spawn")
+    if context.get_start_method() == "fork":
+        _worker.update(state, models=models, pipeline=pipeline)
+
+    timings = {"read": 0.0, "score": 0.0, "format": 0.0, "write": 0.0}
+    n_rows = 0
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=(state,)) as pool:
+            if output_csv:
+                out = open(output_path, "wb")
+            else:
+                out = ScoresWriter(output_path)
+            try:
+                # imap keeps input order while later slices are still being scored.
+                for rows, payload, slice_monitor, stages in pool.imap(_score_slice, enumerate(ranges)):
+                    t0 = time.perf_counter()
+                    out.write(payload)
+                    if slice_monitor is not None:
+                        monitor.merge(slice_monitor)
+                    timings["write"] += time.perf_counter() - t0
+                    for stage, seconds in stages.items():
+                        timings[stage] += seconds
+                    n_rows += rows
+            finally:
+                out.close()
+    finally:
+        _worker.clear()
+
+    elapsed = time.perf_counter() - start
+
+    # read/score/format are summed over workers, so they can exceed seconds.
+    return {
+        "rows": n_rows,
+        "models": list(models),
+        "workers": workers,
+        "seconds": elapsed,
+        "rows_per_sec": n_rows / elapsed if elapsed > 0 else 0.0,
+        "stage_seconds": timings,
+    }
@@ -0,0 +1,88 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from src.metrics import span
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL_SECONDS = 3600
+
+
+class PredictionCache:
+    # Thread-safe LRU + TTL cache of probability vectors, keyed by the
+    # encoded feature row, the model name and the model artifact version.
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(row, model_name, version):
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(row, dtype=np.float64).tobytes())
+        digest.update(model_name.encode("utf-8"))
+        digest.update(str(version).encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key):
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, prob = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return prob
+                del self._entries[key]
+            self.misses += 1
+
+        return None
+
+    def put(self, key, prob):
+        prob = np.array(prob, dtype=np.float64)
+        prob.setflags(write=False)
+
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, prob)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+        return prob
+
+    def predict_proba(self, model, row, model_name, version):
+        key = self.make_key(row, model_name, version)
+        prob = self.get(key)
+        if prob is None:
+            with span(f"predict_proba:{model_name}"):
+                prob = model.predict_proba(row)[0]
+            prob = self.put(key, prob)
+
+        return prob
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
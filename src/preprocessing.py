@@ -1,8 +1,33 @@
 import pandas as pd
+import numpy as np
 import joblib
+import json
 import os
+from bisect import bisect_left
+from functools import lru_cache
+
+from src.metrics import timed
 
 BASE_PATH = "models"
+PIPELINE_FILE = "feature_pipeline.json"
+
+# Declarative feature spec shared by training and serving. Raw fields not
+# listed here (customerID, gender, Partner, ...) are ignored.
+NUMERIC_FEATURES = ["SeniorCitizen", "tenure", "MonthlyCharges", "TotalCharges"]
+ENGINEERED_NUMERIC_FEATURES = ["ChargeRatio"]
+CATEGORICAL_FEATURES = [
+    "PhoneService", "MultipleLines", "InternetService", "DeviceProtection",
+    "TechSupport", "StreamingTV", "StreamingMovies", "Contract",
+    "PaperlessBilling", "PaymentMethod", "TenureGroup",
+]
+
+# Raw fields a customer record must carry; TenureGroup is derived from tenure.
+INPUT_FEATURES = NUMERIC_FEATURES + [f for f in CATEGORICAL_FEATURES if f != "TenureGroup"]
+
+# TenureGroup: tenure <= 12, <= 24, <= 48, above.
+TENURE_EDGES = [12, 24, 48]
+TENURE_GROUPS = ["0-1 Year", "1-2 Years", "2-4 Years", "Over 4 Years"]
+
 
 def load_scaler():
     scaler_path = os.path.join(BASE_PATH, "scaler.pkl")
@@ -18,14 +43,222 @@ def load_columns():
     return columns
 
 
-def preprocess_input(input_dict):
-    df = pd.DataFrame([input_dict])
-    df = pd.get_dummies(df)
-    training_columns = load_columns()
-    df = df.reindex(columns=training_columns, fill_value=0)
+def tenure_group(tenure):
+    return TENURE_GROUPS[bisect_left(TENURE_EDGES, tenure)]
+
+
+def _to_float(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return 0.0
+    return 0.0 if value != value else value
+
+
+class FeaturePipeline:
+    # Raw customer fields -> model feature matrix, identical for a single
+    # dict (encode) and a DataFrame of any size (encode_frame):
+    #   1. numeric fields coerced to float (blank/invalid -> 0)
+    #   2. ChargeRatio and TenureGroup derived
+    #   3. categoricals one-hot encoded with the first level dropped
+    #   4. optional standard scaling (only the linear model uses it)
+
+    def __init__(self, columns, categories, mean, scale):
+        self.columns = list(columns)
+        self.n_features = len(self.columns)
+        self.categories = {feature: list(levels) for feature, levels in categories.items()}
+
+        position = {column: i for i, column in enumerate(self.columns)}
+        self.numeric_index = {
+            feature: position[feature]
+            for feature in NUMERIC_FEATURES + ENGINEERED_NUMERIC_FEATURES
+            if feature in position
+        }
+        self.category_index = {
+            feature: {
+                level: position[f"{feature}_{level}"]
+                for level in levels
+                if f"{feature}_{level}" in position
+            }
+            for feature, levels in self.categories.items()
+        }
+
+        self.mean_ = np.asarray(mean, dtype=np.float64).reshape(1, -1)
+        self.scale_ = np.asarray(scale, dtype=np.float64).reshape(1, -1)
+        self._empty_row = np.zeros((1, self.n_features))
+
+    @classmethod
+    def fit(cls, df):
+        # Learns levels and column order the way get_dummies(drop_first=True)
+        # does on the training frame. Scaling stats are set separately
+        # because they are fitted on the SMOTE-balanced training split.
+        numeric = derive_numeric(df)
+        levels = derive_categoricals(df, numeric)
+
+        columns = NUMERIC_FEATURES + ENGINEERED_NUMERIC_FEATURES
+        categories = {}
+        for feature in CATEGORICAL_FEATURES:
+            categories[feature] = sorted(pd.unique(levels[feature].dropna()))
+            columns.extend(f"{feature}_{level}" for level in categories[feature][1:])
+
+        n_features = len(columns)
+        return cls(columns, categories, np.zeros(n_features), np.ones(n_features))
+
+    @classmethod
+    def from_artifacts(cls, columns, scaler):
+        # Rebuild from the legacy model_columns.pkl + scaler.pkl pair. The
+        # dropped baseline level is unknown there, which only matters for
+        # reporting; encoding is unaffected.
+        categories = {feature: [] for feature in CATEGORICAL_FEATURES}
+        for column in columns:
+            for feature in CATEGORICAL_FEATURES:
+                if column.startswith(feature + "_"):
+                    categories[feature].append(column[len(feature) + 1:])
+
+        return cls(columns, categories, scaler.mean_, scaler.scale_)
+
+    def set_scaling(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype=np.float64).reshape(1, -1)
+        self.scale_ = np.asarray(scale, dtype=np.float64).reshape(1, -1)
+        return self
+
+    def scale(self, X):
+        return (X - self.mean_) / self.scale_
+
+    def encode(self, input_dict, scale=True, out=None):
+        if out is None:
+            row = self._empty_row.copy()
+        else:
+            row = out
+            row.fill(0.0)
+
+        values = row[0]
+        numeric_index = self.numeric_index
+
+        tenure = _to_float(input_dict.get("tenure"))
+        monthly = _to_float(input_dict.get("MonthlyCharges"))
+        total = _to_float(input_dict.get("TotalCharges"))
+
+        for feature, value in (
+            ("SeniorCitizen", _to_float(input_dict.get("SeniorCitizen"))),
+            ("tenure", tenure),
+            ("MonthlyCharges", monthly),
+            ("TotalCharges", total),
+            ("ChargeRatio", total / (monthly + 1)),
+        ):
+            index = numeric_index.get(feature)
+            if index is not None:
+                values[index] = value
+
+        for feature, index_by_level in self.category_index.items():
+            if feature == "TenureGroup":
+                level = tenure_group(tenure)
+            else:
+                level = input_dict.get(feature)
+            index = index_by_level.get(level)
+            if index is not None:
+                values[index] = 1.0
+
+        if scale:
+            np.subtract(row, self.mean_, out=row)
+            np.divide(row, self.scale_, out=row)
+
+        return row
+
+    @timed("encode_frame")
+    def encode_frame(self, df, scale=True):
+        n_rows = len(df)
+        X = np.zeros((n_rows, self.n_features))
+
+        numeric = derive_numeric(df)
+        for feature, index in self.numeric_index.items():
+            X[:, index] = numeric[feature]
+
+        levels = derive_categoricals(df, numeric)
+        rows = np.arange(n_rows)
+        for feature, index_by_level in self.category_index.items():
+            if not index_by_level:
+                continue
+            codes = pd.Categorical(levels[feature], categories=list(index_by_level)).codes
+            matched = codes >= 0
+            column_index = np.fromiter(index_by_level.values(), dtype=np.intp, count=len(index_by_level))
+            X[rows[matched], column_index[codes[matched]]] = 1.0
+
+        if scale:
+            X -= self.mean_
+            X /= self.scale_
+
+        return X
+
+    def to_dict(self):
+        return {
+            "columns": self.columns,
+            "categories": self.categories,
+            "mean": self.mean_.ravel().tolist(),
+            "scale": self.scale_.ravel().tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["columns"], data["categories"], data["mean"], data["scale"])
+
+    def save(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+def missing_input_columns(columns):
+    # encode_frame treats absent fields as zero / unknown; callers scoring
+    # uploaded files use this to warn instead of scoring silently.
+    columns = set(columns)
+    return [feature for feature in INPUT_FEATURES if feature not in columns]
+
+
+def derive_numeric(df):
+    numeric = {}
+    for feature in NUMERIC_FEATURES:
+        if feature in df.columns:
+            values = pd.to_numeric(df[feature], errors="coerce")
+            numeric[feature] = values.fillna(0).to_numpy(dtype=np.float64)
+        else:
+            numeric[feature] = np.zeros(len(df))
+
+    numeric["ChargeRatio"] = numeric["TotalCharges"] / (numeric["MonthlyCharges"] + 1)
+
+    return numeric
+
+
+def derive_categoricals(df, numeric):
+    levels = {}
+    for feature in CATEGORICAL_FEATURES:
+        if feature == "TenureGroup":
+            group_index = np.searchsorted(TENURE_EDGES, numeric["tenure"], side="left")
+            levels[feature] = pd.Series(np.asarray(TENURE_GROUPS, dtype=object)[group_index], index=df.index)
+        elif feature in df.columns:
+            levels[feature] = df[feature]
+        else:
+            levels[feature] = pd.Series([None] * len(df), index=df.index, dtype=object)
+
+    return levels
+
+
+def load_feature_pipeline():
+    path = os.path.join(BASE_PATH, PIPELINE_FILE)
+    if os.path.exists(path):
+        with open(path) as f:
+            return FeaturePipeline.from_dict(json.load(f))
+
+    return FeaturePipeline.from_artifacts(load_columns(), load_scaler())
+
+
+@lru_cache(maxsize=1)
+def get_feature_pipeline():
+    return load_feature_pipeline()
 
-    scaler = load_scaler()
 
-    df_scaled = scaler.transform(df)
+@timed("preprocess_input")
+def preprocess_input(input_dict, pipeline=None, scale=True):
+    if pipeline is None:
+        pipeline = get_feature_pipeline()
 
-    return df_scaled
\ No newline at end of file
+    return pipeline.encode(input_dict, scale=scale)
@@ -0,0 +1,226 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.batch_scoring import BATCH_ENGINE, DEFAULT_CHUNKSIZE, ID_COLUMN, model_slug, read_chunks, score_matrix
+from src.calibration import load_calibration
+from src.decision import DecisionPolicy
+from src.model_training import load_all_models
+from src.preprocessing import load_feature_pipeline
+
+SEGMENT_COLUMNS = ("Contract", "InternetService")
+# Input columns ranking needs besides the scores.
+CONTEXT_COLUMNS = ["MonthlyCharges", *SEGMENT_COLUMNS]
+DEFAULT_TOP_K = 5_000
+ALL_CUSTOMERS = "All customers"
+
+
+def expected_loss(probability, monthly_charges, horizon_months):
+    # Revenue at risk over the horizon. A missing or unparseable
+    # MonthlyCharges puts nothing at risk rather than failing the run.
+    charges = pd.to_numeric(monthly_charges, errors="coerce")
+    charges = np.nan_to_num(np.asarray(charges, dtype=np.float64))
+    return np.asarray(probability, dtype=np.float64) * charges * horizon_months
+
+
+class TopK:
+    # The k rows with the largest key seen so far, in bounded memory. Each
+    # update partitions the chunk down to its own top k in O(n) and merges
+    # those with the current list, so at most 2k rows are ever held. Ties
+    # go to the earlier row, so the result does not depend on chunk size.
+
+    def __init__(self, k):
+        self.k = k
+        self.keys = np.empty(0, dtype=np.float64)
+        self.order = np.empty(0, dtype=np.int64)
+        self.rows = None
+
+    def threshold(self):
+        # Smallest key still in the list once it is full.
+        return self.keys[-1] if len(self.keys) >= self.k else -np.inf
+
+    def update(self, keys, order, take):
+        # keys and order (the global row position, used to break ties) are
+        # arrays over the chunk; take(positions) builds the frame of just
+        # those rows, so only candidates are ever materialized.
+        keys = np.asarray(keys, dtype=np.float64)
+        candidates = np.flatnonzero(keys > self.threshold())
+        if len(candidates) > self.k:
+            kth = np.partition(keys[candidates], len(candidates) - self.k)[len(candidates) - self.k]
+            candidates = candidates[keys[candidates] >= kth]
+        if not len(candidates):
+            return
+
+        merged_keys = np.r_[self.keys, keys[candidates]]
+        merged_order = np.r_[self.order, np.asarray(order)[candidates]]
+        rows = take(candidates)
+        merged_rows = rows if self.rows is None else pd.concat([self.rows, rows], ignore_index=True)
+
+        keep = np.lexsort((merged_order, -merged_keys))[:self.k]
+        self.keys = merged_keys[keep]
+        self.order = merged_order[keep]
+        self.rows = merged_rows.iloc[keep].reset_index(drop=True)
+
+
+class Prioritizer:
+    # Streams scored chunks into a ranked call list of the customers with
+    # the most expected revenue at risk, plus per-segment totals. With
+    # per_segment the top k is kept within each segment instead of overall.
+
+    def __init__(self, k=DEFAULT_TOP_K, horizon_months=None, segment_by=(), per_segment=False):
+        self.k = k
+        self.horizon_months = DecisionPolicy.load().loss_months if horizon_months is None else horizon_months
+        self.segment_by = list(segment_by)
+        self.per_segment = per_segment and bool(self.segment_by)
+        self.rows = 0
+        self.top = {}
+        self.totals = None
+
+    def _segments(self, df):
+        if not self.segment_by:
+            return [pd.Series(ALL_CUSTOMERS, index=df.index, name="segment")]
+        return [
+            df[column] if column in df.columns else pd.Series(None, index=df.index, name=column, dtype=object)
+            for column in self.segment_by
+        ]
+
+    def update(self, df, probability, prediction=None):
+        # df holds raw input rows; probability their churn probabilities
+        # (calibrated, so expected losses add up to real money).
+        probability = np.asarray(probability, dtype=np.float64)
+        charges = pd.to_numeric(df["MonthlyCharges"], errors="coerce").to_numpy(dtype=np.float64) \
+            if "MonthlyCharges" in df.columns else np.full(len(df), np.nan)
+        loss = expected_loss(probability, charges, self.horizon_months)
+        order = np.arange(self.rows, self.rows + len(df))
+        segments = self._segments(df)
+        # Without a customerID column the list is identified by row alone.
+        ids = {ID_COLUMN: df[ID_COLUMN]} if ID_COLUMN in df.columns else {}
+
+        def take(positions):
+            return pd.DataFrame({
+                **{column: values.iloc[positions].to_numpy() for column, values in ids.items()},
+                "row": order[positions],
+                **{segment.name: segment.iloc[positions].to_numpy() for segment in segments},
+                "MonthlyCharges": charges[positions],
+                "churn_probability": probability[positions],
+                **({} if prediction is None else {"prediction": np.asarray(prediction)[positions]}),
+                "expected_loss": loss[positions],
+            })
+
+        grouped = pd.DataFrame({
+            "customers": 1,
+            "expected_churners": probability,
+            "monthly_revenue": np.nan_to_num(charges),
+            "expected_loss": loss,
+        }, index=df.index).groupby(segments, sort=False, dropna=False)
+
+        if self.per_segment:
+            for key, positions in grouped.indices.items():
+                self.top.setdefault(key, TopK(self.k)).update(
+                    loss[positions], order[positions], lambda selected, positions=positions: take(positions[selected]))
+        else:
+            self.top.setdefault(ALL_CUSTOMERS, TopK(self.k)).update(loss, order, take)
+
+        totals = grouped.sum()
+        self.totals = totals if self.totals is None else self.totals.add(totals, fill_value=0)
+        self.rows += len(df)
+
+    def _ranked(self):
+        lists = [top.rows for top in self.top.values() if top.rows is not None]
+        if not lists:
+            return pd.DataFrame()
+        calls = pd.concat(lists, ignore_index=True).sort_values(["expected_loss", "row"], ascending=[False, True],
+                                                                kind="stable", ignore_index=True)
+        calls.insert(0, "rank", np.arange(1, len(calls) + 1))
+        if self.per_segment:
+            calls.insert(1, "segment_rank", calls.groupby(self.segment_by, sort=False, dropna=False).cumcount() + 1)
+        return calls
+
+    def call_list(self):
+        calls = self._ranked()
+        return calls if self.segment_by else calls.drop(columns="segment", errors="ignore")
+
+    def segment_summary(self):
+        if self.totals is None:
+            return pd.DataFrame()
+        summary = self.totals.reset_index()
+        keys = list(self.totals.index.names)
+        summary["customers"] = summary["customers"].astype(np.int64)
+        summary["mean_churn_probability"] = summary["expected_churners"] / summary["customers"]
+        summary["share_of_expected_loss"] = summary["expected_loss"] / max(summary["expected_loss"].sum(), 1e-12)
+
+        calls = self._ranked()
+        if len(calls):
+            listed = calls.groupby(keys, dropna=False).agg(in_call_list=("rank", "size"),
+                                                           call_list_loss=("expected_loss", "sum"))
+            summary = summary.merge(listed.reset_index(), on=keys, how="left")
+        else:
+            summary["in_call_list"] = 0
+            summary["call_list_loss"] = 0.0
+        summary[["in_call_list", "call_list_loss"]] = summary[["in_call_list", "call_list_loss"]].fillna(0)
+        summary["in_call_list"] = summary["in_call_list"].astype(np.int64)
+
+        return summary.sort_values("expected_loss", ascending=False, ignore_index=True)
+
+
+def prioritize_file(input_path, model_name, k=DEFAULT_TOP_K, segment_by=(), per_segment=False,
+                    horizon_months=None, chunksize=DEFAULT_CHUNKSIZE, engine=BATCH_ENGINE, calibrate=True):
+    # Scores a customer file chunk by chunk and ranks it; memory is one
+    # chunk plus the call list, whatever the file size.
+    models = load_all_models(engine)
+    model = {model_name: models[model_name]}
+    pipeline = load_feature_pipeline()
+    policy = DecisionPolicy.load()
+    calibration = load_calibration() if calibrate else None
+    slug = model_slug(model_name)
+    column = f"{slug}_calibrated_probability" if calibrate else f"{slug}_probability"
+
+    prioritizer = Prioritizer(k, policy.loss_months if horizon_months is None else horizon_months,
+                              segment_by, per_segment)
+    for chunk in read_chunks(input_path, chunksize):
+        scores = score_matrix(pipeline.encode_frame(chunk, scale=False), model, pipeline, policy, calibration)
+        prioritizer.update(chunk, scores[column], scores[f"{slug}_prediction"])
+
+    return prioritizer
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank customers by expected revenue at risk for a retention campaign.")
+    parser.add_argument("input", help="CSV or Parquet file shaped like data/Telco-Customer-Churn.csv")
+    parser.add_argument("output", help="Call list to write (.csv)")
+    parser.add_argument("--model", default="Logistic Regression")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K)
+    parser.add_argument("--horizon-months", type=float, default=None,
+                        help="Months of MonthlyCharges at risk per churner (default: the decision policy's)")
+    parser.add_argument("--segment-by", nargs="*", choices=SEGMENT_COLUMNS, default=[])
+    parser.add_argument("--per-segment", action="store_true", help="Keep the top K within each segment")
+    parser.add_argument("--summary", default=None, help="Also write the per-segment summary to this CSV")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--no-calibration", action="store_true", help="Rank on raw model probabilities")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        parser.error(f"input file not found: {args.input}")
+
+    start = time.perf_counter()
+    prioritizer = prioritize_file(args.input, args.model, args.top_k, args.segment_by, args.per_segment,
+                                  args.horizon_months, args.chunksize, calibrate=not args.no_calibration)
+    calls = prioritizer.call_list()
+    calls.to_csv(args.output, index=False)
+    summary = prioritizer.segment_summary()
+    if args.summary:
+        summary.to_csv(args.summary, index=False)
+
+    elapsed = time.perf_counter() - start
+    print(f"Ranked {prioritizer.rows:,} customers in {elapsed:.2f}s; "
+          f"{len(calls):,} on the call list -> {args.output}")
+    print(f"Expected loss on the list: {calls['expected_loss'].sum() if len(calls) else 0:,.0f} "
+          f"of {summary['expected_loss'].sum():,.0f} ({prioritizer.horizon_months:g} months horizon)")
+    print(summary.round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from functools import lru_cache
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from src.batch_scoring import ID_COLUMN, model_slug, score_matrix
+from src.calibration import get_calibration
+from src.cohort_index import index_fingerprint
+from src.decision import DecisionPolicy
+from src.evaluation import DATA_PATH, load_data
+from src.model_training import BASE_PATH, ModelRegistry
+from src.preprocessing import get_feature_pipeline
+
+SCORE_TABLE_FILE = os.path.join(BASE_PATH, "score_table.joblib")
+BUILD_CHUNKSIZE = 1_000
+SEARCH_LIMIT = 10
+# Serializes load-or-build-and-save, as in src.cohort_index.
+_build_lock = threading.Lock()
+
+
+def table_fingerprint(data_path, registry, pipeline, calibration):
+    # The cohort index fingerprint plus the calibration (method, keys and
+    # knots), since the table stores calibrated probabilities too.
+    digest = hashlib.sha256(index_fingerprint(data_path, registry, pipeline).encode())
+    digest.update(json.dumps(calibration.to_dict(), sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ScoreTable:
+    # Every customer in the dataset scored by every model, one raw and one
+    # calibrated probability column per model. Decisions are not stored:
+    # they are taken at lookup time with the current decision policy, so
+    # retuning a threshold never invalidates the table.
+
+    def __init__(self, customers, scores, models, fingerprint=None):
+        self.customers = customers
+        self.scores = scores
+        self.models = list(models)
+        self.fingerprint = fingerprint
+        self.columns = {column: scores[column].to_numpy() for column in scores.columns}
+        # IDs are matched case-insensitively, the way people type them.
+        ids = customers[ID_COLUMN].astype(str).str.upper().to_numpy()
+        # Reversed so the first row wins if an ID appears twice.
+        self.positions = {customer_id: position for position, customer_id in reversed(list(enumerate(ids)))}
+        self.sorted_ids = np.sort(ids)
+
+    @classmethod
+    def build(cls, data_path=DATA_PATH, registry=None, pipeline=None, calibration=None,
+              chunksize=BUILD_CHUNKSIZE, progress=None):
+        # progress(done, total) is called after every chunk.
+        registry = ModelRegistry() if registry is None else registry
+        pipeline = get_feature_pipeline() if pipeline is None else pipeline
+        calibration = get_calibration(registry) if calibration is None else calibration
+
+        customers = load_data(data_path).reset_index(drop=True)
+        models = {name: registry.get(name) for name in registry.available()}
+        # Any policy will do: the predictions it adds are dropped.
+        policy = DecisionPolicy()
+
+        columns = {}
+        for start in range(0, len(customers), chunksize):
+            chunk = customers.iloc[start:start + chunksize]
+            scores = score_matrix(pipeline.encode_frame(chunk, scale=False), models, pipeline, policy, calibration)
+            for column, values in scores.items():
+                if not column.endswith("_prediction"):
+                    columns.setdefault(column, []).append(values)
+            if progress is not None:
+                progress(start + len(chunk), len(customers))
+
+        scores = pd.DataFrame({column: np.concatenate(parts) for column, parts in columns.items()})
+        return cls(customers, scores, models, table_fingerprint(data_path, registry, pipeline, calibration))
+
+    def __len__(self):
+        return len(self.customers)
+
+    def position(self, customer_id):
+        return self.positions.get(str(customer_id).strip().upper())
+
+    def __contains__(self, customer_id):
+        return self.position(customer_id) is not None
+
+    def lookup(self, customer_id, policy=None):
+        # One result per model, shaped like src.comparison's, or None for an
+        # unknown customerID.
+        position = self.position(customer_id)
+        if position is None:
+            return None
+        policy = DecisionPolicy.load() if policy is None else policy
+
+        results = []
+        for name in self.models:
+            slug = model_slug(name)
+            prob = float(self.columns[f"{slug}_probability"][position])
+            results.append({
+                "model": name,
+                "churn_probability": prob,
+                "calibrated_churn_probability": float(self.columns[f"{slug}_calibrated_probability"][position]),
+                "prediction": int(policy.decide(name, prob)),
+            })
+        return results
+
+    def customer(self, customer_id):
+        # The stored record in the shape the prediction form produces, so a
+        # looked-up customer can be opened on the full result page.
+        position = self.position(customer_id)
+        if position is None:
+            return None
+
+        record = self.customers.iloc[position].drop(ID_COLUMN).to_dict()
+        record["SeniorCitizen"] = int(record["SeniorCitizen"])
+        record["tenure"] = int(record["tenure"])
+        for column in ("MonthlyCharges", "TotalCharges"):
+            # TotalCharges is blank for brand-new customers.
+            value = pd.to_numeric(record[column], errors="coerce")
+            record[column] = 0.0 if pd.isna(value) else float(value)
+        return record
+
+    def search(self, prefix, limit=SEARCH_LIMIT):
+        # customerIDs starting with prefix, by binary search on the sorted IDs.
+        prefix = str(prefix).strip().upper()
+        start = np.searchsorted(self.sorted_ids, prefix, side="left")
+        end = np.searchsorted(self.sorted_ids, prefix + "\uffff", side="left")
+        return self.sorted_ids[start:min(end, start + limit)].tolist()
+
+    def save(self, path=SCORE_TABLE_FILE):
+        # Written aside and renamed, so a reader never sees a partial file.
+        tmp_path = f"{path}.tmp"
+        joblib.dump({
+            "fingerprint": self.fingerprint,
+            "customers": self.customers,
+            "scores": self.scores,
+            "models": self.models,
+        }, tmp_path)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=SCORE_TABLE_FILE):
+        state = joblib.load(path)
+        return cls(state["customers"], state["scores"], state["models"], state["fingerprint"])
+
+
+def load_score_table(path=SCORE_TABLE_FILE, data_path=DATA_PATH, registry=None, pipeline=None,
+                     calibration=None, progress=None):
+    # Loads the snapshot, rebuilding (and re-saving) it only when the data,
+    # a model, the pipeline or the calibration changed since it was written.
+    registry = ModelRegistry() if registry is None else registry
+    pipeline = get_feature_pipeline() if pipeline is None else pipeline
+    calibration = get_calibration(registry) if calibration is None else calibration
+    fingerprint = table_fingerprint(data_path, registry, pipeline, calibration)
+
+    with _build_lock:
+        if os.path.exists(path):
+            table = ScoreTable.load(path)
+            if table.fingerprint == fingerprint:
+                if progress is not None:
+                    progress(len(table), len(table))
+                return table
+
+        table = ScoreTable.build(data_path, registry, pipeline, calibration, progress=progress)
+        table.save(path)
+        return table
+
+
+class ScoreTableJob:
+    # Loads or builds the score table on a background thread. done, total,
+    # table and error can be read from any thread while it runs.
+
+    def __init__(self, path=SCORE_TABLE_FILE, data_path=DATA_PATH, registry=None):
+        self.path = path
+        self.data_path = data_path
+        self.registry = registry
+        self.done = 0
+        self.total = 0
+        self.table = None
+        self.error = None
+        self.seconds = None
+        self.thread = threading.Thread(target=self._run, name="score-table", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _progress(self, done, total):
+        self.done, self.total = done, total
+
+    def _run(self):
+        start = time.perf_counter()
+        try:
+            self.table = load_score_table(self.path, self.data_path, self.registry, progress=self._progress)
+        except Exception as exc:
+            self.error = exc
+        self.seconds = time.perf_counter() - start
+
+    @property
+    def ready(self):
+        return self.table is not None
+
+    def fraction(self):
+        return self.done / self.total if self.total else 0.0
+
+
+_JOB_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=1)
+def _start_job(registry):
+    return ScoreTableJob(registry=registry).start()
+
+
+def get_score_table_job(registry=None):
+    # One job per process, started on the first call. Locked because the
+    # app calls it from its warm-up thread and its script thread at once.
+    with _JOB_LOCK:
+        return _start_job(registry)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every existing customer with every model.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output", default=SCORE_TABLE_FILE)
+    parser.add_argument("--chunksize", type=int, default=BUILD_CHUNKSIZE)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = ScoreTable.build(args.data, chunksize=args.chunksize)
+    table.save(args.output)
+    print(f"Scored {len(table):,} customers with {', '.join(table.models)} "
+          f"in {time.perf_counter() - start:.2f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
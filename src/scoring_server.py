@@ -0,0 +1,351 @@
+import argparse
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from http import HTTPStatus
+from urllib.parse import urlsplit
+
+import numpy as np
+import pandas as pd
+
+from src.calibration import load_calibration
+from src.decision import DecisionPolicy
+from src.metrics import METRICS, enable, span, start_profiler_from_env
+from src.model_training import ModelRegistry, needs_scaling
+from src.preprocessing import get_feature_pipeline
+
+DEFAULT_MAX_BATCH = 64
+DEFAULT_MAX_WAIT_MS = 2.0
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class HTTPError(Exception):
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class LatencyTracker:
+
+    def __init__(self, window=10_000):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+
+    def record(self, route, seconds):
+        if route not in self._samples:
+            self._samples[route] = deque(maxlen=self.window)
+            self._counts[route] = 0
+        self._samples[route].append(seconds)
+        self._counts[route] += 1
+
+    def summary(self):
+        summary = {}
+        for route, samples in self._samples.items():
+            values = np.fromiter(samples, dtype=np.float64) * 1000.0
+            summary[route] = {
+                "count": self._counts[route],
+                "p50_ms": float(np.percentile(values, 50)),
+                "p99_ms": float(np.percentile(values, 99)),
+                "max_ms": float(values.max()),
+            }
+        return summary
+
+
+class MicroBatcher:
+    # Coalesces concurrent single-row requests for one model into a single
+    # predict_proba call. A batch is flushed when it reaches max_batch rows
+    # or max_wait_ms after its first row arrived, whichever comes first.
+
+    def __init__(self, model, max_batch=DEFAULT_MAX_BATCH, max_wait_ms=DEFAULT_MAX_WAIT_MS, name="model"):
+        self.model = model
+        self.stage = f"predict_proba:{name}"
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = asyncio.Queue()
+        self.batches = 0
+        self.rows = 0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, row):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future))
+        return await future
+
+    def _predict_proba(self, X):
+        with span(self.stage):
+            return self.model.predict_proba(X)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            pending = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            X = np.vstack([row for row, _ in pending])
+            try:
+                prob = await loop.run_in_executor(None, self._predict_proba, X)
+            except Exception as exc:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            self.batches += 1
+            self.rows += len(pending)
+            for (_, future), row_prob in zip(pending, prob):
+                if not future.done():
+                    future.set_result(row_prob)
+
+
+class ScoringService:
+
+    def __init__(self, registry=None, pipeline=None, max_batch=DEFAULT_MAX_BATCH,
+                 max_wait_ms=DEFAULT_MAX_WAIT_MS):
+        self.registry = ModelRegistry() if registry is None else registry
+        self.pipeline = get_feature_pipeline() if pipeline is None else pipeline
+        self.models = self.registry.load_all()
+        self.policy = DecisionPolicy.load()
+        self.calibration = load_calibration(registry=self.registry, pipeline=self.pipeline)
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.batchers = {}
+        self.latency = LatencyTracker()
+
+    def start(self):
+        for name, model in self.models.items():
+            batcher = MicroBatcher(model, self.max_batch, self.max_wait_ms, name)
+            batcher.start()
+            self.batchers[name] = batcher
+
+    async def stop(self):
+        for batcher in self.batchers.values():
+            await batcher.stop()
+
+    def _model_name(self, payload):
+        name = payload.get("model")
+        if name is None or name == "":
+            name = next(iter(self.models), None)
+        elif not isinstance(name, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'model' must be a string")
+        if name not in self.models:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Unknown or unavailable model: {name}")
+        return name
+
+    def _result(self, name, prob):
+        return {
+            "probability": float(prob[1]),
+            "calibrated_probability": float(self.calibration.calibrate(name, prob[1])),
+            "prediction": int(prob[1] > self.policy.threshold(name)),
+        }
+
+    async def predict(self, payload):
+        name = self._model_name(payload)
+        customer = payload.get("customer")
+        if not isinstance(customer, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'customer' must be a JSON object")
+
+        row = self.pipeline.encode(customer, scale=needs_scaling(name))
+        prob = await self.batchers[name].submit(row)
+
+        return {"model": name, **self._result(name, prob)}
+
+    async def predict_batch(self, payload):
+        name = self._model_name(payload)
+        customers = payload.get("customers")
+        if not isinstance(customers, list) or not all(isinstance(c, dict) for c in customers):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "'customers' must be a list of JSON objects")
+        if not customers:
+            return {"model": name, "results": []}
+
+        X = self.pipeline.encode_frame(pd.DataFrame.from_records(customers), scale=needs_scaling(name))
+        loop = asyncio.get_running_loop()
+        prob = await loop.run_in_executor(None, self.models[name].predict_proba, X)
+
+        return {"model": name, "results": [self._result(name, p) for p in prob]}
+
+    def stats(self):
+        return {
+            "latency": self.latency.summary(),
+            "micro_batching": {
+                name: {
+                    "batches": batcher.batches,
+                    "rows": batcher.rows,
+                    "mean_batch_size": batcher.rows / batcher.batches if batcher.batches else 0.0,
+                }
+                for name, batcher in self.batchers.items()
+            },
+        }
+
+    async def dispatch(self, method, path, body):
+        if method == "GET" and path == "/health":
+            return {"status": "ok"}
+        if method == "GET" and path == "/models":
+            return {"models": list(self.models)}
+        if method == "GET" and path == "/stats":
+            return self.stats()
+        if method == "GET" and path == "/metrics":
+            # Prometheus text format; empty histograms unless started with --metrics.
+            return METRICS.prometheus_text()
+
+        if method == "POST" and path in ("/predict", "/predict/batch"):
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body is not valid JSON")
+            if not isinstance(payload, dict):
+                raise HTTPError(HTTPStatus.BAD_REQUEST, "Request body must be a JSON object")
+
+            if path == "/predict":
+                return await self.predict(payload)
+            return await self.predict_batch(payload)
+
+        raise HTTPError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+
+                start = time.perf_counter()
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Malformed request line"}, False)
+                    break
+
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        key, value = line.split(":", 1)
+                        headers[key.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                    if length < 0:
+                        raise ValueError(length)
+                except ValueError:
+                    await self._respond(writer, HTTPStatus.BAD_REQUEST, {"error": "Invalid Content-Length"}, False)
+                    break
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Body too large"}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" and (version != "HTTP/1.0" or connection == "keep-alive")
+                path = urlsplit(target).path
+
+                try:
+                    status, response = HTTPStatus.OK, await self.dispatch(method, path, body)
+                except HTTPError as exc:
+                    status, response = exc.status, {"error": exc.message}
+                except Exception:
+                    # Details go to the log, not to the client.
+                    logger.exception("Error handling %s %s", method, path)
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Internal server error"}
+
+                await self._respond(writer, status, response, keep_alive)
+                elapsed = time.perf_counter() - start
+                self.latency.record(f"{method} {path}", elapsed)
+                if METRICS.enabled:
+                    METRICS.observe(f"request:{method} {path}", elapsed)
+
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        if isinstance(payload, str):
+            body = payload.encode("utf-8")
+            content_type = "text/plain; version=0.0.4"
+        else:
+            body = json.dumps(payload).encode("utf-8")
+            content_type = "application/json"
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            "\r\n"
+        ).encode("latin-1")
+        writer.write(head + body)
+        await writer.drain()
+
+
+async def serve(host="127.0.0.1", port=8000, max_batch=DEFAULT_MAX_BATCH,
+                max_wait_ms=DEFAULT_MAX_WAIT_MS):
+    service = ScoringService(max_batch=max_batch, max_wait_ms=max_wait_ms)
+    service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+
+    print(f"Serving {', '.join(service.models)} on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTTP/JSON churn scoring service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="Largest number of single-row requests coalesced into one predict_proba call")
+    parser.add_argument("--max-wait-ms", type=float, default=DEFAULT_MAX_WAIT_MS,
+                        help="How long the first request of a batch waits for others to join")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Record per-stage timings, served at GET /metrics (also on with CHURN_METRICS=1)")
+    args = parser.parse_args()
+
+    if args.metrics:
+        enable()
+    start_profiler_from_env()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from sklearn.model_selection import GridSearchCV, StratifiedKFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+from sklearn.linear_model import LogisticRegression
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
+
+from src.model_training import BASE_PATH, MODEL_FILES, SCALED_MODELS, ModelRegistry
+from src.preprocessing import FeaturePipeline, PIPELINE_FILE
+
+DATA_PATH = "data/Telco-Customer-Churn.csv"
+TARGET_COLUMN = "Churn"
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+
+
+PARAM_GRIDS = {
+    "Logistic Regression": {
+        "model__C": [0.01, 0.1, 1.0, 10.0],
+    },
+    "Decision Tree": {
+        "model__max_depth": [3, 5, 7, 10],
+        "model__min_samples_leaf": [1, 5, 20],
+    },
+    "Random Forest": {
+        "model__n_estimators": [100, 200],
+        "model__max_depth": [8, 10, 15],
+        "model__min_samples_leaf": [1, 5],
+    },
+}
+
+
+def make_estimator(model_name):
+    if model_name == "Logistic Regression":
+        return LogisticRegression(max_iter=1000)
+    if model_name == "Decision Tree":
+        return DecisionTreeClassifier(max_depth=5, random_state=RANDOM_STATE)
+    if model_name == "Random Forest":
+        return RandomForestClassifier(n_estimators=100, max_depth=10, random_state=RANDOM_STATE)
+    raise KeyError(f"Unknown model: {model_name}")
+
+
+def load_training_frame(path=DATA_PATH):
+    df = pd.read_csv(path)
+    df[TARGET_COLUMN] = df[TARGET_COLUMN].map({"No": 0, "Yes": 1})
+
+    return df
+
+
+def split_features(df, pipeline):
+    # Cleaning, TenureGroup/ChargeRatio and one-hot encoding all come from
+    # the same FeaturePipeline the app uses at serving time.
+    X = pipeline.encode_frame(df, scale=False)
+    y = df[TARGET_COLUMN].to_numpy()
+
+    return train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+def build_search_pipeline(model_name):
+    # SMOTE lives inside the pipeline so each CV fold is resampled from its
+    # own training part only and validation folds stay untouched.
+    from imblearn.over_sampling import SMOTE
+    from imblearn.pipeline import Pipeline
+
+    steps = [("smote", SMOTE(random_state=RANDOM_STATE))]
+    if model_name in SCALED_MODELS:
+        steps.append(("scaler", StandardScaler()))
+    steps.append(("model", make_estimator(model_name)))
+
+    return Pipeline(steps)
+
+
+def search_model(model_name, X_train, y_train, cv=5, scoring="roc_auc", n_jobs=-1):
+    search = GridSearchCV(
+        build_search_pipeline(model_name),
+        PARAM_GRIDS[model_name],
+        cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=RANDOM_STATE),
+        scoring=scoring,
+        n_jobs=n_jobs,
+        refit=False,
+    )
+    search.fit(X_train, y_train)
+
+    params = {key.split("__", 1)[1]: value for key, value in search.best_params_.items()}
+
+    return params, float(search.best_score_)
+
+
+def evaluate(model, X_test, y_test):
+    proba = model.predict_proba(X_test)
+    prob = proba[:, 1]
+    pred = model.classes_[np.argmax(proba, axis=1)]
+
+    return {
+        "accuracy": float(accuracy_score(y_test, pred)),
+        "precision": float(precision_score(y_test, pred)),
+        "recall": float(recall_score(y_test, pred)),
+        "f1": float(f1_score(y_test, pred)),
+        "roc_auc": float(roc_auc_score(y_test, prob)),
+    }
+
+
+@contextmanager
+def timed(timings, stage):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+        print(f"[{timings[stage]:7.2f}s] {stage}")
+
+
+def train(data_path=DATA_PATH, output_dir=BASE_PATH, model_names=None, cv=5,
+          scoring="roc_auc", n_jobs=-1):
+    from imblearn.over_sampling import SMOTE
+
+    model_names = list(MODEL_FILES) if model_names is None else model_names
+    timings = {}
+    report = {"models": {}}
+
+    with timed(timings, "load + feature engineering"):
+        df = load_training_frame(data_path)
+        pipeline = FeaturePipeline.fit(df)
+        X_train, X_test, y_train, y_test = split_features(df, pipeline)
+
+    with timed(timings, "SMOTE + scaling"):
+        smote = SMOTE(random_state=RANDOM_STATE)
+        X_train_balanced, y_train_balanced = smote.fit_resample(X_train, y_train)
+
+        scaler = StandardScaler()
+        scaler.fit(X_train_balanced)
+        pipeline.set_scaling(scaler.mean_, scaler.scale_)
+        X_train_scaled = pipeline.scale(X_train_balanced)
+        X_test_scaled = pipeline.scale(X_test)
+
+    os.makedirs(output_dir, exist_ok=True)
+
+    for model_name in model_names:
+        with timed(timings, f"{model_name}: cross-validated search"):
+            params, cv_score = search_model(model_name, X_train, y_train, cv, scoring, n_jobs)
+
+        with timed(timings, f"{model_name}: final fit"):
+            model = make_estimator(model_name).set_params(**params)
+            if model_name in SCALED_MODELS:
+                model.fit(X_train_scaled, y_train_balanced)
+                metrics = evaluate(model, X_test_scaled, y_test)
+            else:
+                model.fit(X_train_balanced, y_train_balanced)
+                metrics = evaluate(model, X_test, y_test)
+
+        joblib.dump(model, os.path.join(output_dir, MODEL_FILES[model_name]))
+        report["models"][model_name] = {
+            "params": params,
+            f"cv_{scoring}": cv_score,
+            "test": metrics,
+        }
+
+    pipeline.save(os.path.join(output_dir, PIPELINE_FILE))
+    # Legacy artifacts, still read by load_scaler() / load_columns().
+    joblib.dump(scaler, os.path.join(output_dir, "scaler.pkl"))
+    joblib.dump(pipeline.columns, os.path.join(output_dir, "model_columns.pkl"))
+
+    with timed(timings, "export compiled artifacts"):
+        from src.artifacts import export_artifacts
+
+        export_artifacts(os.path.join(output_dir, "compiled"),
+                         ModelRegistry(output_dir, engine="sklearn"), pipeline)
+
+    with timed(timings, "cohort index"):
+        from src.cohort_index import COHORT_INDEX_FILE, CohortIndex
+
+        registry = ModelRegistry(output_dir, compiled_dir=os.path.join(output_dir, "compiled"))
+        index = CohortIndex.build(data_path, registry, pipeline)
+        index.save(os.path.join(output_dir, os.path.basename(COHORT_INDEX_FILE)))
+
+    with timed(timings, "monitoring profile"):
+        from src.monitoring import PROFILE_FILE, build_profile, save_profile
+
+        save_profile(build_profile(data_path, registry, pipeline),
+                     os.path.join(output_dir, os.path.basename(PROFILE_FILE)))
+
+    with timed(timings, "calibration"):
+        from src.calibration import CALIBRATION_FILE, build_calibration
+
+        calibration = build_calibration(registry, pipeline, data_path)
+        calibration.save(os.path.join(output_dir, os.path.basename(CALIBRATION_FILE)))
+        for model_name, summary in calibration.summary.items():
+            if model_name in report["models"]:
+                report["models"][model_name]["calibration"] = summary
+
+    with timed(timings, "score table"):
+        from src.score_table import SCORE_TABLE_FILE, ScoreTable
+
+        table = ScoreTable.build(data_path, registry, pipeline, calibration)
+        table.save(os.path.join(output_dir, os.path.basename(SCORE_TABLE_FILE)))
+
+    report["stage_seconds"] = timings
+    report["total_seconds"] = sum(timings.values())
+    with open(os.path.join(output_dir, "training_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain the churn models and write the artifacts in models/.")
+    parser.add_argument("--data", default=DATA_PATH)
+    parser.add_argument("--output-dir", default=BASE_PATH)
+    parser.add_argument("--models", nargs="+", default=None, help="Model names to train (default: all)")
+    parser.add_argument("--cv", type=int, default=5)
+    parser.add_argument("--scoring", default="roc_auc")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Worker processes for the search (-1 = all cores)")
+    args = parser.parse_args()
+
+    report = train(args.data, args.output_dir, args.models, args.cv, args.scoring, args.n_jobs)
+
+    print()
+    for model_name, result in report["models"].items():
+        test = result["test"]
+        print(f"{model_name:<20} {result['params']}  "
+              f"acc={test['accuracy']:.4f} prec={test['precision']:.4f} "
+              f"rec={test['recall']:.4f} f1={test['f1']:.4f} auc={test['roc_auc']:.4f}")
+    print(f"\nTotal wall time: {report['total_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import numpy as np
+
+CHUNK_ROWS = 8192
+TRAVERSAL_CHUNK_ROWS = 1024
+# Above this many rows sklearn's Cython traversal beats lockstep NumPy.
+NATIVE_MAX_ROWS = 2048
+
+
+class PackedTrees:
+    # All trees of a DecisionTreeClassifier / RandomForestClassifier laid
+    # end to end in flat node arrays. Leaves point to themselves so every
+    # tree can be advanced in lockstep for max_depth steps.
+
+    ARRAYS = ("feature", "threshold", "left", "right", "fractions", "roots")
+
+    def __init__(self, feature, threshold, left, right, fractions, roots, max_depth, class_index=1):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.fractions = fractions
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.n_trees = len(roots)
+        self.value = np.ascontiguousarray(fractions[:, class_index])
+
+    @classmethod
+    def from_estimators(cls, estimators, class_index=1):
+        features, thresholds, lefts, rights, fractions, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes)
+            is_leaf = tree.children_left == -1
+
+            counts = tree.value[:, 0, :]
+
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold))
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            fractions.append(counts / counts.sum(axis=1, keepdims=True))
+            roots.append(offset)
+
+            offset += n_nodes
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            np.concatenate(features).astype(np.intp),
+            np.concatenate(thresholds),
+            np.concatenate(lefts).astype(np.intp),
+            np.concatenate(rights).astype(np.intp),
+            np.concatenate(fractions),
+            np.asarray(roots, dtype=np.intp),
+            max_depth,
+            class_index,
+        )
+
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+
+class TreeEnsemblePredictor:
+    # Drop-in predict_proba for fitted DecisionTreeClassifier and
+    # RandomForestClassifier models. All trees are advanced in lockstep over
+    # a batch of rows, so a single row costs max_depth small NumPy steps
+    # instead of sklearn's per-call validation and per-estimator dispatch.
+    # Past a few thousand rows sklearn's compiled traversal is faster, so
+    # larger batches go to the original estimator when it is available.
+
+    def __init__(self, classes, trees, estimator=None, max_native_rows=NATIVE_MAX_ROWS):
+        self.classes_ = np.asarray(classes)
+        self.trees = trees
+        self.estimator = estimator
+        self.max_native_rows = max_native_rows
+
+    @classmethod
+    def from_model(cls, model, **kwargs):
+        estimators = model.estimators_ if hasattr(model, "estimators_") else [model]
+        return cls(model.classes_, PackedTrees.from_estimators(estimators), estimator=model, **kwargs)
+
+    def predict_proba(self, X):
+        if self.estimator is not None and len(X) > self.max_native_rows:
+            return self.estimator.predict_proba(X)
+
+        # sklearn evaluates splits on float32 inputs; match it exactly.
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        if X32.ndim == 1:
+            X32 = X32.reshape(1, -1)
+
+        proba = np.empty((len(X32), self.trees.fractions.shape[1]))
+        for start in range(0, len(X32), TRAVERSAL_CHUNK_ROWS):
+            chunk = X32[start:start + TRAVERSAL_CHUNK_ROWS]
+            proba[start:start + len(chunk)] = self._predict_chunk(chunk)
+
+        return proba
+
+    def _predict_chunk(self, X32):
+        trees = self.trees
+        # node[t, r] is the current node of tree t for row r.
+        node = np.repeat(trees.roots[:, None], len(X32), axis=1)
+        row_offset = (np.arange(len(X32)) * X32.shape[1])[None, :]
+        flat = X32.ravel()
+
+        for _ in range(trees.max_depth):
+            go_left = flat[row_offset + trees.feature[node]] <= trees.threshold[node]
+            node = np.where(go_left, trees.left[node], trees.right[node])
+
+        # Reducing over the leading tree axis adds the trees one after the
+        # other, the same order sklearn accumulates them in.
+        proba = np.add.reduce(trees.fractions[node], axis=0)
+        if trees.n_trees > 1:
+            proba /= trees.n_trees
+
+        return proba
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def is_tree_model(model):
+    return hasattr(model, "estimators_") or hasattr(model, "tree_")
+
+
+def compile_model(model):
+    # Tree models get the native predictor; anything else is returned as is.
+    if is_tree_model(model):
+        return TreeEnsemblePredictor.from_model(model)
+    return model
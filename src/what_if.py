@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from src.model_training import needs_scaling
+from src.preprocessing import CATEGORICAL_FEATURES
+
+# Values tried for the numeric fields; the customer's own value is added.
+NUMERIC_GRIDS = {
+    "tenure": np.arange(0, 73, 6),
+    "MonthlyCharges": np.arange(20, 121, 10),
+    "TotalCharges": np.array([0, 250, 500, 1000, 2000, 3000, 4000, 6000, 8000]),
+    "SeniorCitizen": np.array([0, 1]),
+}
+# TenureGroup follows tenure, so it is never perturbed on its own.
+WHAT_IF_CATEGORICALS = [feature for feature in CATEGORICAL_FEATURES if feature != "TenureGroup"]
+
+
+def perturbations(customer, pipeline, grids=NUMERIC_GRIDS):
+    # The customer followed by every single-field change of them: each level
+    # of each categorical and each grid value of each numeric field. Derived
+    # features (TenureGroup, ChargeRatio) are recomputed by the encoder.
+    # Combinations the form would not produce (e.g. no internet service but
+    # streaming TV) are scored as-is, like any other input.
+    rows = [customer]
+    changes = [(None, None)]
+
+    for feature in WHAT_IF_CATEGORICALS:
+        for level in pipeline.categories.get(feature, []):
+            if level != customer.get(feature):
+                rows.append({**customer, feature: level})
+                changes.append((feature, level))
+
+    for feature, grid in grids.items():
+        current = float(customer.get(feature) or 0)
+        for value in np.union1d(grid, [current]):
+            if value != current:
+                rows.append({**customer, feature: value})
+                changes.append((feature, value))
+
+    return pd.DataFrame.from_records(rows), changes
+
+
+def what_if(customer, models, pipeline, policy=None):
+    # Scores the customer and all their perturbations with one predict_proba
+    # call per model. Returns the customer's own probabilities and a table
+    # with one row per change: feature, value, and per model the churn
+    # probability, its change from the customer's, and (given a decision
+    # policy) whether the churn decision flips.
+    frame, changes = perturbations(customer, pipeline)
+    X = pipeline.encode_frame(frame, scale=False)
+    X_scaled = None
+
+    table = pd.DataFrame(changes[1:], columns=["feature", "value"])
+    base = {}
+    for name, model in models.items():
+        if needs_scaling(name):
+            if X_scaled is None:
+                X_scaled = pipeline.scale(X)
+            prob = model.predict_proba(X_scaled)[:, 1]
+        else:
+            prob = model.predict_proba(X)[:, 1]
+
+        base[name] = float(prob[0])
+        table[f"{name} probability"] = prob[1:]
+        table[f"{name} change"] = prob[1:] - prob[0]
+        if policy is not None:
+            threshold = policy.threshold(name)
+            table[f"{name} flips"] = (prob[1:] > threshold) != (prob[0] > threshold)
+
+    return base, table
+
+
+def strongest_changes(table, model_name, k=10, direction=-1):
+    # The k changes that move this model's churn probability furthest;
+    # direction=-1 for the biggest reductions, 1 for the biggest increases.
+    change = table[f"{model_name} change"].to_numpy()
+    order = np.argsort(direction * -change, kind="stable")[:k]
+    picked = table.iloc[order]
+    return picked[direction * picked[f"{model_name} change"] > 0]
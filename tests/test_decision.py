@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from src.decision import RetentionValueSweep, churn_decision
+
+PROB = np.array([0.9, 0.8, 0.2])
+CHARGES = np.full(3, 50.0)
+Y = np.array([1, 0, 1])
+
+
+def _brute_force_value(prob, threshold, offer_cost=20.0, save_rate=0.3, loss_months=12.0):
+    targeted = churn_decision(prob, threshold).astype(bool)
+    return save_rate * loss_months * float((Y * CHARGES)[targeted].sum()) - offer_cost * int(targeted.sum())
+
+
+@pytest.mark.parametrize("threshold", [1.0, 0.95, 0.9])
+def test_value_at_or_above_top_score_contacts_nobody(threshold):
+    sweep = RetentionValueSweep(PROB, CHARGES, Y)
+    assert sweep.value_at(threshold) == 0.0
+
+
+@pytest.mark.parametrize("threshold", [0.0, -0.5])
+def test_value_below_lowest_cut_contacts_everyone(threshold):
+    sweep = RetentionValueSweep(PROB, CHARGES, Y)
+    assert sweep.value_at(threshold) == pytest.approx(_brute_force_value(PROB, threshold))
+    assert sweep.value_at(threshold) == pytest.approx(sweep.values()[-1])
+
+
+@pytest.mark.parametrize("threshold", [0.85, 0.8, 0.5, 0.2, 0.1])
+def test_value_at_matches_churn_decision(threshold):
+    sweep = RetentionValueSweep(PROB, CHARGES, Y)
+    assert sweep.value_at(threshold) == pytest.approx(_brute_force_value(PROB, threshold))
+
+
+def test_last_cut_targets_zero_probabilities():
+    prob = np.array([0.9, 0.5, 0.0])
+    sweep = RetentionValueSweep(prob, CHARGES, Y)
+    assert [int(churn_decision(prob, t).sum()) for t in sweep.thresholds] == list(sweep.targeted)
+    assert sweep.targeted[-1] == 3
+
+
+def test_optimize_fallback_threshold_is_worth_nothing():
+    sweep = RetentionValueSweep(PROB, CHARGES, Y)
+    best = sweep.optimize(offer_cost=1e6)
+    assert best["targeted"] == 0
+    assert sweep.value_at(best["threshold"], offer_cost=1e6) == 0.0
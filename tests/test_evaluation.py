@@ -0,0 +1,18 @@
+import numpy as np
+
+from src.evaluation import holdout_scores
+
+
+def test_holdout_cache_replaces_superseded_entries(tmp_path):
+    stale = tmp_path / "decision_tree-0123456789abcdef.npz"
+    stale.write_bytes(b"")
+
+    first = holdout_scores(cache_dir=str(tmp_path))
+    files = sorted(path.name for path in tmp_path.iterdir())
+    second = holdout_scores(cache_dir=str(tmp_path))
+
+    assert stale.name not in files
+    assert len(files) == len(first)
+    assert not any(name.endswith(".tmp") for name in files)
+    for name in first:
+        np.testing.assert_array_equal(first[name][1], second[name][1])
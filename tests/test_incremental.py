@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+from src.batch_scoring import model_slug, score_frame
+from src.incremental import connect, latest_scores, rescore_file
+from src.model_training import ModelRegistry
+from src.preprocessing import get_feature_pipeline
+
+DATA_PATH = "data/Telco-Customer-Churn.csv"
+
+
+def _extract(tmp_path, name, df):
+    path = tmp_path / name
+    df.to_csv(path, index=False)
+    return str(path)
+
+
+def test_unchanged_extract_rescores_nothing(tmp_path):
+    db = str(tmp_path / "store.sqlite")
+    day1 = _extract(tmp_path, "day1.csv", pd.read_csv(DATA_PATH).head(200))
+
+    first = rescore_file(day1, db)
+    second = rescore_file(day1, db)
+
+    assert first["changed"] == 200
+    assert all(count == 200 for count in first["rescored"].values())
+    assert second["changed"] == 0
+    assert all(count == 0 for count in second["rescored"].values())
+
+
+def test_subset_run_leaves_other_models_stale(tmp_path):
+    registry = ModelRegistry()
+    names = registry.available()
+    db = str(tmp_path / "store.sqlite")
+    df = pd.read_csv(DATA_PATH).head(200)
+    rescore_file(_extract(tmp_path, "day1.csv", df), db, registry=registry)
+
+    day2 = df.copy()
+    day2.loc[:9, "MonthlyCharges"] += 5
+    day2_path = _extract(tmp_path, "day2.csv", day2)
+
+    subset = rescore_file(day2_path, db, model_names=names[:1], registry=registry)
+    full = rescore_file(day2_path, db, registry=registry)
+
+    assert subset["rescored"] == {names[0]: 10}
+    assert full["changed"] == 0
+    assert full["rescored"] == {name: (0 if name == names[0] else 10) for name in names}
+
+    expected = score_frame(day2, registry.load_all(), get_feature_pipeline()).set_index("customerID")
+    for name in names:
+        stored = latest_scores(db, name).set_index("customer_id")["probability"]
+        column = expected[f"{model_slug(name)}_probability"]
+        np.testing.assert_allclose(stored.loc[column.index].to_numpy(), column.to_numpy(), rtol=0, atol=1e-12)
+
+
+def test_old_store_is_migrated(tmp_path):
+    import sqlite3
+
+    db = str(tmp_path / "store.sqlite")
+    with sqlite3.connect(db) as conn:
+        conn.executescript("""
+            CREATE TABLE customers (customer_id TEXT PRIMARY KEY, feature_hash INTEGER NOT NULL,
+                                    updated_at TEXT NOT NULL);
+            CREATE TABLE scores (customer_id TEXT NOT NULL, model TEXT NOT NULL, model_version TEXT NOT NULL,
+                                 probability REAL NOT NULL, prediction INTEGER NOT NULL, scored_at TEXT NOT NULL,
+                                 PRIMARY KEY (customer_id, model));
+        """)
+
+    conn = connect(db)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(scores)")}
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    conn.close()
+
+    assert "feature_hash" in columns
+    assert "customers" not in tables
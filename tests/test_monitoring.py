@@ -0,0 +1,35 @@
+import json
+
+import numpy as np
+
+from src.monitoring import KS_WARN, PSI_WARN, binned_ks, drift_status, psi, save_profile
+
+EXPECTED = np.full(10, 100)
+
+
+def test_ks_flags_a_shift_that_psi_misses():
+    # 11% of the mass moved from the lower to the upper half of the deciles.
+    actual = np.r_[np.full(5, 78), np.full(5, 122)]
+    assert psi(actual, EXPECTED) < PSI_WARN
+    assert binned_ks(actual, EXPECTED) >= KS_WARN
+
+    status = drift_status([psi(actual, EXPECTED)], [binned_ks(actual, EXPECTED)], [0.0])
+    assert status.tolist() == ["warn"]
+
+
+def test_large_ks_shift_is_drift():
+    actual = np.r_[np.full(5, 60), np.full(5, 140)]
+    assert drift_status([psi(actual, EXPECTED)], [binned_ks(actual, EXPECTED)], [0.0]).tolist() == ["drift"]
+
+
+def test_stable_and_categorical_rows_stay_ok():
+    assert drift_status([psi(EXPECTED, EXPECTED), 0.0], [binned_ks(EXPECTED, EXPECTED), np.nan],
+                        [0.0, 0.0]).tolist() == ["ok", "ok"]
+
+
+def test_save_profile_replaces_the_file(tmp_path):
+    path = tmp_path / "profile.json"
+    path.write_text("{}")
+    save_profile({"fingerprint": "abc"}, str(path))
+    assert json.loads(path.read_text()) == {"fingerprint": "abc"}
+    assert [p.name for p in tmp_path.iterdir()] == ["profile.json"]
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+from src.batch_scoring import ID_COLUMN
+from src.prioritization import Prioritizer
+
+CHARGES = [50.0, 100.0, 20.0, 80.0]
+PROB = np.array([0.5, 0.4, 0.9, 0.1])
+
+
+def test_call_list_ranks_by_expected_loss():
+    df = pd.DataFrame({ID_COLUMN: ["a", "b", "c", "d"], "MonthlyCharges": CHARGES})
+    prioritizer = Prioritizer(k=3, horizon_months=12)
+    prioritizer.update(df.iloc[:2], PROB[:2])
+    prioritizer.update(df.iloc[2:], PROB[2:])
+
+    calls = prioritizer.call_list()
+    assert calls[ID_COLUMN].tolist() == ["b", "a", "c"]
+    np.testing.assert_allclose(calls["expected_loss"], [480.0, 300.0, 216.0])
+
+
+def test_frame_without_ids_has_no_id_column():
+    df = pd.DataFrame({"MonthlyCharges": CHARGES})
+    prioritizer = Prioritizer(k=2, horizon_months=12)
+    prioritizer.update(df, PROB)
+
+    calls = prioritizer.call_list()
+    assert ID_COLUMN not in calls.columns
+    assert calls["row"].tolist() == [1, 0]
@@ -0,0 +1,43 @@
+import os
+
+import numpy as np
+
+from src.batch_scoring import model_slug
+from src.calibration import Calibration, Calibrator, get_calibration
+from src.model_training import ModelRegistry
+from src.score_table import ScoreTable, load_score_table
+
+
+def _rebuilds(monkeypatch):
+    builds = []
+    build = ScoreTable.build.__func__
+
+    def counted(cls, *args, **kwargs):
+        builds.append(1)
+        return build(cls, *args, **kwargs)
+
+    monkeypatch.setattr(ScoreTable, "build", classmethod(counted))
+    return builds
+
+
+def test_snapshot_is_reused_until_calibration_changes(tmp_path, monkeypatch):
+    registry = ModelRegistry()
+    path = str(tmp_path / "score_table.joblib")
+    calibration = get_calibration(registry)
+    builds = _rebuilds(monkeypatch)
+
+    first = load_score_table(path, registry=registry, calibration=calibration)
+    again = load_score_table(path, registry=registry, calibration=calibration)
+    assert len(builds) == 1
+    assert again.fingerprint == first.fingerprint
+    assert not os.path.exists(f"{path}.tmp")
+
+    # A refit (here: every model mapped to half its raw score) invalidates it.
+    halved = Calibration({name: Calibrator("platt", [0.0, 1.0], [0.0, 0.5]) for name in registry.available()},
+                         calibration.keys)
+    refit = load_score_table(path, registry=registry, calibration=halved)
+    assert len(builds) == 2
+    for name in registry.available():
+        slug = model_slug(name)
+        np.testing.assert_allclose(refit.columns[f"{slug}_calibrated_probability"],
+                                   refit.columns[f"{slug}_probability"] / 2)
@@ -0,0 +1,71 @@
+import asyncio
+import json
+
+import pytest
+
+from src.scoring_server import ScoringService
+
+
+async def _request(service, raw):
+    # Sends one raw HTTP request to a throwaway server and returns
+    # (status code, JSON body).
+    server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(raw)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+    head, _, body = response.partition(b"\r\n\r\n")
+    return int(head.split(b" ")[1]), json.loads(body)
+
+
+def _post(path, payload):
+    body = json.dumps(payload).encode()
+    return (f"POST {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode() + body
+
+
+@pytest.fixture(scope="module")
+def service():
+    return ScoringService()
+
+
+@pytest.mark.parametrize("model", [["x"], {}, [], 0, 3.5])
+def test_non_string_model_is_a_bad_request(service, model):
+    status, body = asyncio.run(_request(service, _post("/predict/batch", {"model": model, "customers": []})))
+    assert status == 400
+    assert body == {"error": "'model' must be a string"}
+
+
+def test_unknown_model_is_not_found(service):
+    status, _ = asyncio.run(_request(service, _post("/predict/batch", {"model": "Nope", "customers": []})))
+    assert status == 404
+
+
+@pytest.mark.parametrize("length", ["abc", "-5"])
+def test_invalid_content_length_is_a_bad_request(service, length):
+    raw = f"POST /predict HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode()
+    status, body = asyncio.run(_request(service, raw))
+    assert status == 400
+    assert body == {"error": "Invalid Content-Length"}
+
+
+def test_internal_errors_are_not_echoed(service, monkeypatch, caplog):
+    async def broken(method, path, body):
+        raise RuntimeError("secret detail")
+
+    monkeypatch.setattr(service, "dispatch", broken)
+    status, body = asyncio.run(_request(service, _post("/predict", {})))
+
+    assert status == 500
+    assert "secret detail" not in json.dumps(body)
+    assert "secret detail" in caplog.text
+
+
+def test_missing_model_uses_the_default(service):
+    customer = {"tenure": 1, "MonthlyCharges": 70.0, "TotalCharges": 70.0, "Contract": "Month-to-month"}
+    status, body = asyncio.run(_request(service, _post("/predict/batch", {"customers": [customer]})))
+    assert status == 200
+    assert body["model"] == next(iter(service.models))
+    assert 0.0 <= body["results"][0]["probability"] <= 1.0